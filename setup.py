@@ -26,6 +26,13 @@ uninstall_entry_point = "collective.recipe.vscode:uninstall"
 entry_points = {
     "zc.buildout": ["default = {0}".format(entry_point)],
     "zc.buildout.uninstall": ["default = {0}".format(uninstall_entry_point)],
+    "console_scripts": [
+        "vscode-typecheck = collective.recipe.vscode.typecheck:main",
+        "vscode-batch = collective.recipe.vscode.batch:main",
+        "vscode-gc = collective.recipe.vscode.cache:main",
+        "vscode-importtime = collective.recipe.vscode.importtime:main",
+        "vscode-zcml = collective.recipe.vscode.zcml:main",
+    ],
 }
 
 setup(
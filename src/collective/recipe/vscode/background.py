@@ -0,0 +1,217 @@
+# _*_ coding: utf-8 _*_
+"""Detached background worker for the steps only editor needs (symbol index,
+libspec files), so that buildout doesn't need to wait for them.
+
+Steps are [name, "module:function", keyword arguments] items with JSON
+serializable arguments. Progress is written into status file under .vscode/,
+lock file tells which inputs are being processed. Log of the previous run is
+kept as vs-recipe-background.log.1, older ones are dropped.
+"""
+import errno
+import hashlib
+import importlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+
+
+STATUS_FILE = "vs-recipe-background.json"
+LOCK_FILE = "vs-recipe-background.lock"
+JOB_FILE = "vs-recipe-background-job.json"
+LOG_FILE = "vs-recipe-background.log"
+WORKER_MODULE = "collective.recipe.vscode.background"
+# lock of a worker which is not known to be alive is ignored after this
+STALE_SECONDS = 3600
+WAIT_SECONDS = 0.5
+
+
+def inputs_hash(steps):
+    """ """
+    data = json.dumps(steps, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+
+def read_json(path):
+    """ """
+    try:
+        with io.open(path, "rb") as fp:
+            return json.loads(fp.read().decode("utf-8"))
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    """Replace file at once, so that readers never see partial content."""
+    tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+    with io.open(tmp_path, "wb") as fp:
+        fp.write(json.dumps(data, indent=2, sort_keys=True).encode("utf-8"))
+    replace_file(tmp_path, path)
+
+
+def replace_file(source, target):
+    """ """
+    try:
+        os.replace(source, target)
+    except AttributeError:
+        # python 2
+        if os.path.exists(target):
+            os.unlink(target)
+        os.rename(source, target)
+
+
+def pid_alive(pid):
+    """ """
+    if os.name == "nt":
+        # os.kill would terminate the process, rely on lock age only
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as exc:
+        return exc.errno == errno.EPERM
+    return True
+
+
+def lock_alive(lock):
+    """ """
+    if not lock or time.time() - lock.get("started", 0) > STALE_SECONDS:
+        return False
+    return pid_alive(lock.get("pid", 0))
+
+
+def acquire_lock(settings_dir, digest):
+    """Create lock file for this process, returns False if other alive worker
+    has it."""
+    path = os.path.join(settings_dir, LOCK_FILE)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+            if lock_alive(read_json(path)):
+                return False
+            # left behind by crashed worker
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            continue
+        lock = {"pid": os.getpid(), "hash": digest, "started": time.time()}
+        with io.open(fd, "wb") as fp:
+            fp.write(json.dumps(lock).encode("utf-8"))
+        return True
+    return False
+
+
+def release_lock(settings_dir):
+    """ """
+    try:
+        os.unlink(os.path.join(settings_dir, LOCK_FILE))
+    except OSError:
+        pass
+
+
+def resolve(dotted_name):
+    """Function of "module:function" name."""
+    module_name, name = dotted_name.split(":")
+    return getattr(importlib.import_module(module_name), name)
+
+
+def run_steps(settings_dir, steps):
+    """Run steps in this process, status file is updated after each step.
+    Returns the final status."""
+    status_file = os.path.join(settings_dir, STATUS_FILE)
+    status = {
+        "state": "running",
+        "hash": inputs_hash(steps),
+        "pid": os.getpid(),
+        "started": time.time(),
+        "steps": dict((name, {"state": "pending"}) for name, _, _ in steps),
+    }
+    write_json(status_file, status)
+
+    for name, function, kwargs in steps:
+        started = time.time()
+        try:
+            step = {"state": "done", "result": resolve(function)(**kwargs)}
+        except Exception:  # noqa: B902
+            step = {"state": "failed", "error": traceback.format_exc()}
+        step["seconds"] = round(time.time() - started, 2)
+        status["steps"][name] = step
+        write_json(status_file, status)
+
+    failed = [s for s in status["steps"].values() if s["state"] == "failed"]
+    status["state"] = "failed" if failed else "done"
+    status["finished"] = time.time()
+    write_json(status_file, status)
+    return status
+
+
+def start(settings_dir, steps):
+    """Start detached worker for the steps, unless a worker with the same
+    inputs is already running or waiting for the lock. Returns pid of the
+    worker or None."""
+    digest = inputs_hash(steps)
+    lock = read_json(os.path.join(settings_dir, LOCK_FILE))
+    if lock and lock.get("hash") == digest and lock_alive(lock):
+        return None
+    job_file = os.path.join(settings_dir, JOB_FILE)
+    job = read_json(job_file)
+    if job and job.get("hash") == digest and lock_alive(job):
+        # spawned, but doesn't have the lock yet
+        return None
+
+    # marked before spawning, the job is taken by this process until the
+    # worker's pid is known
+    job = {"hash": digest, "steps": steps, "pid": os.getpid(), "started": time.time()}
+    write_json(job_file, job)
+
+    log_file = os.path.join(settings_dir, LOG_FILE)
+    if os.path.exists(log_file):
+        # previous worker may still write into it
+        replace_file(log_file, log_file + ".1")
+
+    # worker needs the same packages, those buildout has put in sys.path
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    with io.open(log_file, "wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", WORKER_MODULE, settings_dir, digest],
+            cwd=settings_dir,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            close_fds=True,
+            # detach from buildout's session, so that it is not waited or killed
+            preexec_fn=getattr(os, "setsid", None),
+        )
+    process.stdin.close()
+    job["pid"] = process.pid
+    write_json(job_file, job)
+    return process.pid
+
+
+def main(argv):
+    """Worker: waits for previous worker to finish, and runs the latest job
+    unless it has been superseded by newer one."""
+    settings_dir, digest = argv
+    while not acquire_lock(settings_dir, digest):
+        time.sleep(WAIT_SECONDS)
+    try:
+        job = read_json(os.path.join(settings_dir, JOB_FILE))
+        if not job or job["hash"] != digest:
+            # newer worker takes care of it
+            return 0
+        status = run_steps(settings_dir, job["steps"])
+    finally:
+        release_lock(settings_dir)
+    return 1 if status["state"] == "failed" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
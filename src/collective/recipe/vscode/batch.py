@@ -0,0 +1,158 @@
+# _*_ coding: utf-8 _*_
+"""Generate editor settings of many buildouts (i.e. in a monorepo) in parallel,
+without running the whole buildout of each project."""
+from .recipes import ensure_unicode
+
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+
+RECIPE = "collective.recipe.vscode"
+SKIPPED_DIRECTORIES = ("node_modules", "eggs", "develop-eggs", "parts", "var")
+
+
+def discover(directory, config="buildout.cfg"):
+    """Project roots under directory, those buildout config uses this recipe.
+    Projects are not searched inside other projects."""
+    roots = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(
+            d
+            for d in dirnames
+            if not d.startswith(".") and d not in SKIPPED_DIRECTORIES
+        )
+        if config not in filenames:
+            continue
+        with io.open(os.path.join(dirpath, config), "r", encoding="utf-8") as fp:
+            if RECIPE not in fp.read():
+                continue
+        roots.append(os.path.abspath(dirpath))
+        dirnames[:] = []
+    return roots
+
+
+def recipe_parts(buildout):
+    """Names of the sections using this recipe, found without initializing
+    other sections (and their recipes)."""
+    return sorted(
+        name
+        for name, section in buildout._raw.items()
+        if section.get("recipe", "").split(":")[0].strip() == RECIPE
+    )
+
+
+def generate(job):
+    """Run settings generation of all recipe parts of the project, this is
+    executed in process pool."""
+    from zc.buildout.buildout import Buildout
+
+    root, config, offline = job
+    started = time.time()
+    result = {"project": root, "parts": [], "error": None}
+    cwd = os.getcwd()
+    # with background-steps = false, steps run here and start pools of their own
+    multiprocessing.current_process().daemon = False
+    try:
+        os.chdir(root)
+        options = [("buildout", "log-level", "WARNING")]
+        if offline:
+            options.append(("buildout", "offline", "true"))
+        buildout = Buildout(os.path.join(root, config), options)
+        for name in recipe_parts(buildout):
+            part = buildout[name]
+            if offline and "offline-resolution" not in part.recipe.user_options:
+                part["offline-resolution"] = "true"
+            part.recipe.install()
+            result["parts"].append(name)
+    except Exception:  # noqa: B902
+        result["error"] = traceback.format_exc()
+    finally:
+        os.chdir(cwd)
+    result["seconds"] = round(time.time() - started, 2)
+    return result
+
+
+def format_report(results):
+    """ """
+    width = max([len(r["project"]) for r in results] + [len("project")])
+    row = "{0:<{width}}  {1:>5}  {2:>8}  {3}"
+    lines = [row.format("project", "parts", "seconds", "status", width=width)]
+    for result in results:
+        lines.append(
+            row.format(
+                result["project"],
+                len(result["parts"]),
+                "{0:.2f}".format(result["seconds"]),
+                "error" if result["error"] else "ok",
+                width=width,
+            )
+        )
+    lines.append(
+        row.format(
+            "total",
+            sum(len(r["parts"]) for r in results),
+            "{0:.2f}".format(sum(r["seconds"] for r in results)),
+            "{0} failed".format(len([r for r in results if r["error"]])),
+            width=width,
+        )
+    )
+    for result in results:
+        if result["error"]:
+            lines.extend(["", result["project"]])
+            lines.extend("    " + line for line in result["error"].splitlines())
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """vscode-batch: generate settings of many buildout projects in parallel."""
+    parser = argparse.ArgumentParser(
+        description="Generate editor settings of many buildout projects with "
+        "collective.recipe.vscode in parallel."
+    )
+    parser.add_argument("roots", nargs="*", help="Project roots")
+    parser.add_argument(
+        "--discover", metavar="DIRECTORY", help="Find projects under directory"
+    )
+    parser.add_argument("--config", default="buildout.cfg")
+    parser.add_argument(
+        "--online",
+        action="store_true",
+        help="Allow resolution to contact package indexes",
+    )
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--json", dest="json_file", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    roots = [os.path.abspath(root) for root in args.roots]
+    if args.discover:
+        roots.extend(r for r in discover(args.discover, args.config) if r not in roots)
+    if not roots:
+        print("No projects found.")
+        return 0
+
+    logging.basicConfig(level=logging.WARNING)
+    jobs = [(root, args.config, not args.online) for root in sorted(roots)]
+    pool = multiprocessing.Pool(max(1, min(args.processes, len(jobs))))
+    try:
+        results = pool.map(generate, jobs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    print(format_report(results))
+    if args.json_file:
+        with io.open(args.json_file, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(results, indent=2, sort_keys=True)))
+
+    return 1 if any(r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# _*_ coding: utf-8 _*_
+"""Bytecode precompilation of eggs locations into a shared pycache prefix
+(PYTHONPYCACHEPREFIX, Python 3.8+), instead of __pycache__ directories next to
+the sources."""
+import io
+import json
+import multiprocessing
+import os
+import subprocess
+
+
+MANIFEST_FILE = "manifest.json"
+
+
+def compile_location(job):
+    """Compile one location with compileall of the target interpreter, which
+    skips files with up to date bytecode. This is executed in process pool."""
+    python, pycache_prefix, location = job
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPYCACHEPREFIX"] = pycache_prefix
+    process = subprocess.Popen(
+        [python, "-X", "pycache_prefix=" + pycache_prefix]
+        + ["-m", "compileall", "-q", location],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    out, _ = process.communicate()
+    return location, process.returncode == 0, out.decode("utf-8", "replace").strip()
+
+
+def compile_locations(pycache_prefix, python, locations, processes=None):
+    """Compile locations ([location, versions, develop]) into pycache_prefix.
+    Eggs whose versions did not change since last run are skipped as a whole,
+    develop eggs are always visited, returns compiled, reused and failed
+    locations."""
+    if not os.path.exists(pycache_prefix):
+        os.makedirs(pycache_prefix)
+    manifest_file = os.path.join(pycache_prefix, MANIFEST_FILE)
+    try:
+        with io.open(manifest_file, "rb") as fp:
+            manifest = json.loads(fp.read().decode("utf-8"))
+    except (IOError, ValueError):
+        manifest = {}
+
+    # bytecode is per interpreter (cache tag), so is the manifest
+    compiled_versions = manifest.setdefault(python, {})
+    jobs, reused = [], []
+    for location, versions, develop in locations:
+        if not os.path.isdir(location):
+            continue
+        if not develop and compiled_versions.get(location) == sorted(versions):
+            reused.append(location)
+            continue
+        jobs.append((python, pycache_prefix, location))
+
+    versions = dict((location, sorted(v)) for location, v, _ in locations)
+    compiled, failed = [], []
+    if jobs:
+        pool = multiprocessing.Pool(processes or multiprocessing.cpu_count())
+        try:
+            for location, success, _ in pool.imap_unordered(compile_location, jobs):
+                # other files of the location are compiled also when some
+                # fail (i.e. Python 2 only skin scripts), an unchanged egg
+                # would fail again
+                compiled_versions[location] = versions[location]
+                if success:
+                    compiled.append(location)
+                else:
+                    failed.append(location)
+        finally:
+            pool.close()
+            pool.join()
+
+    with io.open(manifest_file, "wb") as fp:
+        fp.write(json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+    return sorted(compiled), sorted(reused), sorted(failed)
@@ -0,0 +1,237 @@
+# _*_ coding: utf-8 _*_
+"""Size and age bounded garbage collection of the caches the recipe manages,
+in the project (.vscode/) and in the user wide cache directory.
+
+Each top level entry of a cache directory (file or directory) is evicted as a
+whole: first those not used within the age budget, then the least recently
+used ones until the cache fits into its size budget. Last use is the newest
+access or modification time of the files of the entry. Entries of the pycache
+prefix, which mirrors absolute source directories, are the files of each
+directory instead.
+"""
+from collections import OrderedDict
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+
+MEGABYTE = 1024 * 1024
+DAY = 24 * 60 * 60
+
+# name: (location, directory, size budget in MB, age budget in days), location
+# is either project (.vscode/) or user (cache-directory)
+CACHES = OrderedDict(
+    [
+        ("profiles", ("project", "profiles", 500, 30)),
+        ("libspec", ("project", "libspec", 100, 180)),
+        ("mypy", ("user", "mypy", 1000, 60)),
+        ("black", ("user", "black", 100, 60)),
+        ("pycache", ("user", "pycache", 2000, 60)),
+    ]
+)
+
+# caches, those entries are the files of each (nested) directory
+NESTED = ("pycache",)
+
+# entries, those are never evicted (the cache is consistent without the others)
+KEEP = ("manifest.json",)
+
+
+def default_budgets():
+    """ """
+    return OrderedDict(
+        (name, (size * MEGABYTE, age * DAY))
+        for name, (_, _, size, age) in CACHES.items()
+    )
+
+
+def parse_budgets(text):
+    """Budgets from lines like "profiles 200 14" (name, size in MB, age in days),
+    merged into default budgets."""
+    budgets = default_budgets()
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if len(parts) != 3 or parts[0] not in CACHES:
+            raise ValueError(
+                "Invalid cache budget {0!r}, expected <{1}> <size MB> "
+                "<age days>".format(line, "|".join(CACHES))
+            )
+        budgets[parts[0]] = (float(parts[1]) * MEGABYTE, float(parts[2]) * DAY)
+    return budgets
+
+
+def cache_directories(settings_dir, cache_directory, pycache_prefix=None):
+    """ """
+    roots = {"project": settings_dir, "user": cache_directory}
+    directories = OrderedDict(
+        (name, os.path.join(roots[location], directory))
+        for name, (location, directory, _, _) in CACHES.items()
+    )
+    if pycache_prefix:
+        directories["pycache"] = pycache_prefix
+    return directories
+
+
+def _file_usage(path):
+    """ """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0, 0
+    return stat.st_size, max(stat.st_atime, stat.st_mtime)
+
+
+def entry_usage(path):
+    """Size and last use of file or directory."""
+    if not os.path.isdir(path) or os.path.islink(path):
+        return _file_usage(path)
+    size, last_used = 0, _file_usage(path)[1]
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            file_size, file_used = _file_usage(os.path.join(dirpath, filename))
+            size += file_size
+            last_used = max(last_used, file_used)
+    return size, last_used
+
+
+def remove_entry(path):
+    """ """
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def top_level_entries(directory):
+    """(last used, size, paths) of each top level file or directory."""
+    entries = []
+    for name in os.listdir(directory):
+        if name not in KEEP:
+            path = os.path.join(directory, name)
+            size, last_used = entry_usage(path)
+            entries.append((last_used, size, [path]))
+    return entries
+
+
+def nested_entries(directory):
+    """(last used, size, paths) of the files of each nested directory."""
+    entries = []
+    for dirpath, _, filenames in os.walk(directory):
+        paths = [
+            os.path.join(dirpath, f)
+            for f in sorted(filenames)
+            if dirpath != directory or f not in KEEP
+        ]
+        if paths:
+            usage = [_file_usage(path) for path in paths]
+            entries.append(
+                (max(u[1] for u in usage), sum(u[0] for u in usage), paths)
+            )
+    return entries
+
+
+def collect(directory, max_size, max_age, now=None, dry_run=False, nested=False):
+    """Evict expired and least recently used entries of the cache directory,
+    returns statistics."""
+    now = now or time.time()
+    entries = []
+    if os.path.isdir(directory):
+        entries = (nested_entries if nested else top_level_entries)(directory)
+    # least recently used first
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    result = {"entries": len(entries), "size": total, "removed": 0, "freed": 0}
+    for last_used, size, paths in entries:
+        if now - last_used <= max_age and total <= max_size:
+            # other entries are newer
+            break
+        if not dry_run:
+            for path in paths:
+                remove_entry(path)
+        total -= size
+        result["removed"] += 1
+        result["freed"] += size
+    return result
+
+
+def collect_caches(
+    settings_dir, cache_directory, budgets=None, dry_run=False, pycache_prefix=None
+):
+    """Garbage collect all caches, returns statistics by cache name."""
+    budgets = budgets or default_budgets()
+    results = OrderedDict()
+    directories = cache_directories(settings_dir, cache_directory, pycache_prefix)
+    for name, directory in directories.items():
+        max_size, max_age = budgets[name]
+        results[name] = collect(
+            directory, max_size, max_age, dry_run=dry_run, nested=name in NESTED
+        )
+    return results
+
+
+def format_report(results):
+    """ """
+    row = "{0:<10}  {1:>7}  {2:>9}  {3:>7}  {4:>9}"
+    lines = [row.format("cache", "entries", "size MB", "removed", "freed MB")]
+    for name, result in results.items():
+        lines.append(
+            row.format(
+                name,
+                result["entries"],
+                "{0:.1f}".format(result["size"] / float(MEGABYTE)),
+                result["removed"],
+                "{0:.1f}".format(result["freed"] / float(MEGABYTE)),
+            )
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """vscode-gc: garbage collect caches of the project and the user."""
+    from .recipes import default_cache_directory
+
+    parser = argparse.ArgumentParser(
+        description="Evict expired and least recently used entries of the caches "
+        "managed by collective.recipe.vscode."
+    )
+    parser.add_argument("--project-root", default=os.getcwd())
+    parser.add_argument("--cache-directory", default=default_cache_directory())
+    parser.add_argument(
+        "--pycache-prefix", help="Default: pycache under cache directory"
+    )
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="NAME:SIZE_MB:AGE_DAYS",
+        help="Override budget of a cache ({0})".format(", ".join(CACHES)),
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        budgets = parse_budgets("\n".join(b.replace(":", " ") for b in args.budget))
+    except ValueError as exc:
+        parser.error(str(exc))
+    results = collect_caches(
+        os.path.join(args.project_root, ".vscode"),
+        args.cache_directory,
+        budgets,
+        args.dry_run,
+        args.pycache_prefix,
+    )
+    print(format_report(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# _*_ coding: utf-8 _*_
+"""Import time cost of develop eggs by distribution (python -X importtime), with
+the paths resolved by the recipe."""
+from .recipes import ensure_unicode
+from .recipes import load_paths
+from zc.buildout import UserError
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.+)$")
+OTHER = "(stdlib and others)"
+
+
+def import_targets(distributions):
+    """Top level packages of develop eggs, namespace packages (i.e. plone.app.foo)
+    by their project name."""
+    targets = []
+    for project_name, dist in sorted(distributions.items()):
+        if not dist["develop"]:
+            continue
+        if "." in project_name:
+            targets.append(project_name)
+        else:
+            targets.extend(dist.get("top-level") or [project_name])
+    return targets
+
+
+def module_owners(distributions):
+    """Module name prefixes of distributions."""
+    owners = {}
+    for project_name, dist in distributions.items():
+        for name in dist.get("top-level") or []:
+            owners.setdefault(name, project_name)
+        # namespace packages share the top level name
+        owners[project_name] = project_name
+    return owners
+
+
+def owner_of(module, owners):
+    """Distribution of the module, by its longest known prefix."""
+    parts = module.split(".")
+    for index in range(len(parts), 0, -1):
+        owner = owners.get(".".join(parts[:index]))
+        if owner:
+            return owner
+    return OTHER
+
+
+def parse_importtime(output):
+    """[(module, self us, cumulative us)] of -X importtime output."""
+    imports = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports.append(
+                (match.group(3).strip(), int(match.group(1)), int(match.group(2)))
+            )
+    return imports
+
+
+def measure(job):
+    """Import target once in fresh interpreter, this is executed in process pool."""
+    python, pythonpath, target = job
+    env = dict(os.environ)
+    env["PYTHONPATH"] = pythonpath
+    # importtime of cached bytecode, not of compiling
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    try:
+        process = subprocess.Popen(
+            [python, "-X", "importtime", "-c", "import {0}".format(target)],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        _, output = process.communicate()
+    except OSError as exc:
+        return target, None, str(exc)
+    output = ensure_unicode(output)
+    if process.returncode:
+        lines = output.splitlines()
+        errors = [line for line in lines if not IMPORTTIME_LINE.match(line)]
+        return target, None, "\n".join(errors).strip()
+    return target, parse_importtime(output), None
+
+
+def median(values):
+    """ """
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def aggregate(runs, owners):
+    """Median total and self time by distribution, over the runs of a target."""
+    totals = []
+    by_distribution = {}
+    for run_index, imports in enumerate(runs):
+        totals.append(max([cumulative for _, _, cumulative in imports] or [0]))
+        for module, self_us, _ in imports:
+            owner = owner_of(module, owners)
+            costs = by_distribution.setdefault(owner, [0] * len(runs))
+            costs[run_index] += self_us
+    return {
+        "total_us": median(totals),
+        "distributions": dict(
+            (owner, median(costs)) for owner, costs in by_distribution.items()
+        ),
+    }
+
+
+def format_report(results, limit=10):
+    """ """
+    lines = []
+    ordered = sorted(
+        results.items(), key=lambda item: item[1].get("total_us", 0), reverse=True
+    )
+    row = "{0:<50}  {1:>10}"
+    lines.append(row.format("package / distribution", "ms"))
+    for target, result in ordered:
+        if result.get("error"):
+            lines.append(row.format(target, "error"))
+            lines.extend("    " + line for line in result["error"].splitlines())
+            continue
+        lines.append(row.format(target, "{0:.1f}".format(result["total_us"] / 1000.0)))
+        costs = sorted(
+            result["distributions"].items(), key=lambda item: item[1], reverse=True
+        )
+        for owner, cost in costs[:limit]:
+            lines.append(row.format("    " + owner, "{0:.1f}".format(cost / 1000.0)))
+
+    overall = {}
+    for result in results.values():
+        for owner, cost in result.get("distributions", {}).items():
+            overall[owner] = overall.get(owner, 0) + cost
+    lines.extend(["", row.format("distribution (all packages)", "ms")])
+    for owner, cost in sorted(overall.items(), key=lambda item: item[1], reverse=True):
+        lines.append(row.format(owner, "{0:.1f}".format(cost / 1000.0)))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """vscode-importtime: import time cost of develop eggs by distribution."""
+    parser = argparse.ArgumentParser(
+        description="Measure import time of develop eggs with paths resolved by "
+        "collective.recipe.vscode, aggregated by distribution."
+    )
+    parser.add_argument("--project-root", default=os.getcwd())
+    parser.add_argument(
+        "--module",
+        action="append",
+        default=[],
+        help="Module to import (default: top level packages of develop eggs)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--json", dest="json_file", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        paths = load_paths(args.project_root)
+    except UserError as exc:
+        parser.error(str(exc))
+    targets = args.module or import_targets(paths["distributions"])
+    if not targets:
+        print("No develop eggs to measure.")
+        return 0
+    pythonpath = os.pathsep.join(paths["eggs"] + paths["packages"])
+    jobs = [
+        (paths["python"], pythonpath, target)
+        for target in targets
+        for _ in range(max(1, args.repeat))
+    ]
+
+    pool = multiprocessing.Pool(max(1, min(args.processes, len(jobs))))
+    try:
+        measured = pool.map(measure, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+    owners = module_owners(paths["distributions"])
+    results = {}
+    for target in targets:
+        runs = [imports for t, imports, _ in measured if t == target and imports]
+        errors = [error for t, _, error in measured if t == target and error]
+        if runs:
+            results[target] = aggregate(runs, owners)
+            results[target]["runs"] = len(runs)
+        else:
+            results[target] = {"error": errors[0] if errors else "no output"}
+
+    print(format_report(results, args.limit))
+    if args.json_file:
+        with io.open(args.json_file, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(results, indent=2, sort_keys=True)))
+
+    return 1 if any(r.get("error") for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# _*_ coding: utf-8 _*_
+"""Pre-generated Robot Framework libspec files of libraries in the working set."""
+import io
+import json
+import multiprocessing
+import os
+import subprocess
+
+
+MANIFEST_FILE = "manifest.json"
+
+
+# source of modules, those are Robot Framework libraries
+LIBRARY_MARKERS = (b"ROBOT_LIBRARY_", b"robot.api")
+
+
+def library_modules(location, package):
+    """Modules of the package (dotted name) found in location, those look like
+    Robot Framework libraries (library scope or version, robot.api keywords).
+    Tests are left out."""
+    package_dir = os.path.join(location, *package.split("."))
+    modules = []
+    for root, dirs, files in os.walk(package_dir):
+        dirs[:] = sorted(
+            d
+            for d in dirs
+            if d != "tests" and os.path.exists(os.path.join(root, d, "__init__.py"))
+        )
+        for filename in sorted(files):
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(root, filename)
+            try:
+                with io.open(path, "rb") as fp:
+                    source = fp.read()
+            except IOError:
+                continue
+            if not any(marker in source for marker in LIBRARY_MARKERS):
+                continue
+            names = os.path.relpath(path, location)[: -len(".py")].split(os.sep)
+            if names[-1] == "__init__":
+                names.pop()
+            modules.append(".".join(names))
+    return modules
+
+
+def robot_libraries(distributions):
+    """Library names and versions of distributions depending on Robot Framework.
+    Namespace packages (i.e. plone.app.robotframework) are not libraries of
+    their own, their library modules are found from the sources. Others (i.e.
+    SeleniumLibrary) are libraries by their top level modules."""
+    libraries = {}
+    for project_name, dist in distributions.items():
+        if "robotframework" not in [r.lower() for r in dist.get("requires", [])]:
+            continue
+        if "." in project_name:
+            names = library_modules(dist.get("location", ""), project_name)
+        else:
+            names = dist.get("top-level") or [project_name]
+        for name in names:
+            libraries[name] = "{0}=={1}".format(project_name, dist["version"])
+    return libraries
+
+
+def generate_libspec(job):
+    """Run libdoc for one library, this is executed in process pool."""
+    python, pythonpath, library, output = job
+    env = dict(os.environ)
+    env["PYTHONPATH"] = pythonpath
+    process = subprocess.Popen(
+        [python, "-m", "robot.libdoc", library, output],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    out, _ = process.communicate()
+    return library, process.returncode == 0, out.decode("utf-8", "replace").strip()
+
+
+def generate_libspecs(libspec_dir, python, pythonpath, libraries, processes=None):
+    """Generate libspec files of libraries ({name: version}) into libspec_dir.
+    Only specs whose egg version changed (or missing) are generated again,
+    returns generated and failed library names."""
+    if not os.path.exists(libspec_dir):
+        os.makedirs(libspec_dir)
+    manifest_file = os.path.join(libspec_dir, MANIFEST_FILE)
+    try:
+        with io.open(manifest_file, "rb") as fp:
+            manifest = json.loads(fp.read().decode("utf-8"))
+    except (IOError, ValueError):
+        manifest = {}
+
+    jobs = []
+    for name, version in sorted(libraries.items()):
+        output = os.path.join(libspec_dir, name + ".libspec")
+        if manifest.get(name) == version and os.path.exists(output):
+            continue
+        jobs.append((python, pythonpath, name, output))
+
+    generated, failed = [], []
+    if jobs:
+        pool = multiprocessing.Pool(processes or multiprocessing.cpu_count())
+        try:
+            for name, success, _ in pool.imap_unordered(generate_libspec, jobs):
+                if success:
+                    manifest[name] = libraries[name]
+                    generated.append(name)
+                else:
+                    manifest.pop(name, None)
+                    failed.append(name)
+        finally:
+            pool.close()
+            pool.join()
+
+    # forget libraries, those are not in working set anymore
+    for name in set(manifest) - set(libraries):
+        del manifest[name]
+        spec = os.path.join(libspec_dir, name + ".libspec")
+        if os.path.exists(spec):
+            os.unlink(spec)
+
+    with io.open(manifest_file, "wb") as fp:
+        fp.write(json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+    return sorted(generated), sorted(failed)
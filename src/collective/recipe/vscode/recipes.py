@@ -1,15 +1,22 @@
 # _*_ coding: utf-8 _*_
 """ """
+from . import background
+from .cache import parse_budgets
+from .libspec import robot_libraries
 from collections import OrderedDict
 from zc.buildout import UserError
 
 import io
 import json
 import logging
+import multiprocessing
 import os
+import pkg_resources
 import re
+import shutil
 import subprocess
 import sys
+import zc.buildout.easy_install
 import zc.recipe.egg
 
 
@@ -19,32 +26,80 @@ json_comment = re.compile(r"/\*.*?\*/", re.DOTALL | re.MULTILINE)
 json_dump_params = {"sort_keys": True, "indent": 4, "separators": (",", ":")}
 json_load_params = {}
 
+PATHS_FILE = "vs-recipe-paths.json"
+
+IMPORT_TRACE_FILE = "import-trace.json"
+
+# Files and directories under .vscode/ generated by this recipe, those are removed
+# on uninstall (.coverage data files as well).
+GENERATED_FILES = (
+    "vs-recipe-generated-settings.json",
+    PATHS_FILE,
+    "mypy.ini",
+    "dmypy.json",
+    ".coveragerc",
+    "coverage.xml",
+    "pabot_worker.py",
+    "changed_tests.py",
+    "profile_run.py",
+    "import_trace.py",
+    IMPORT_TRACE_FILE,
+    "profiles",
+    background.STATUS_FILE,
+    background.LOCK_FILE,
+    background.JOB_FILE,
+    background.LOG_FILE,
+    background.LOG_FILE + ".1",
+)
+
+# Incremental indexes under .vscode/, those are kept on uninstall: buildout
+# uninstalls the part on each options change and the reinstall would build them
+# again from scratch (vscode-gc keeps libspec bounded).
+INCREMENTAL_CACHES = ("tags", "symbols.json", "zcml.json", "libspec")
+
+# Keys of pyrightconfig.json (in project root) set by this recipe.
+PYRIGHT_CONFIG_KEYS = ("exclude", "executionEnvironments")
+
+# Tasks (by detail) and launch configurations (by presentation group) generated
+# by this recipe are tagged, those no longer generated are removed.
+GENERATED_TAG = "collective.recipe.vscode"
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts")
+
+INTERPRETER_PROBE = (
+    "import json, sys; "
+    "print(json.dumps(dict(path=sys.path, version=list(sys.version_info[:3]))))"
+)
+
 python_file_defaults = {
     "files.associations": {"*.zcml": "xml"},
     "files.exclude": {"**/*.py[co]": True, "**/*.so": True, "**/__pycache__": True},
 }
 
-ROBOT_LSP_LAUNCH_TEMPLATE = lambda pythonpath: {
-    "type": "robotframework-lsp",
-    "name": "Robot Framework: Launch Template",
-    "request": "launch",
-    "cwd": "^\"\\${workspaceFolder}\"",
-    "target": "^\"\\${file}\"",
-    "terminal": "integrated",
-    "env": {
-        "LISTENER_HOST": "localhost",
-        "LISTENER_PORT": 49999,
-        "PYTHONPATH": pythonpath,
-    },
-    "args": [
-        "--variable",
-        "ZOPE_HOST:localhost",
-        "--variable",
-        "ZOPE_port:55001",
-        "--listener",
-        "plone.app.robotframework.server.RobotListener",
-    ]
-}
+
+def robot_lsp_launch_template(pythonpath):
+    return {
+        "type": "robotframework-lsp",
+        "name": "Robot Framework: Launch Template",
+        "request": "launch",
+        "cwd": "^\"\\${workspaceFolder}\"",
+        "target": "^\"\\${file}\"",
+        "terminal": "integrated",
+        "env": {
+            "LISTENER_HOST": "localhost",
+            "LISTENER_PORT": 49999,
+            "PYTHONPATH": pythonpath,
+        },
+        "args": [
+            "--variable",
+            "ZOPE_HOST:localhost",
+            "--variable",
+            "ZOPE_port:55001",
+            "--listener",
+            "plone.app.robotframework.server.RobotListener",
+        ]
+    }
+
 
 ROBOT_SERVER_TASK_TEMPLATE = {
     "label": "Start Plone Test Server",
@@ -57,6 +112,292 @@ ROBOT_SERVER_TASK_TEMPLATE = {
     "problemMatcher": [],
 }
 
+ROBOT_SERVER_PROBLEM_MATCHER = {
+    "owner": "robot-server",
+    "pattern": {
+        "regexp": "^(ERROR|CRITICAL)\\s+(.*)$",
+        "severity": 1,
+        "message": 2,
+    },
+    "background": {
+        "activeBegins": True,
+        "beginsPattern": "^Set up ",
+        "endsPattern": "(Ready to handle requests|ZSERVER: http)",
+    },
+}
+
+
+def robot_layer_server_task_template(layer, port, listener_port):
+    return {
+        "label": "Start Plone Test Server: {0}".format(layer.split(".")[-1]),
+        "type": "shell",
+        "command": (
+            "LISTENER_PORT={0} ZSERVER_PORT={1} bin/robot-server {2} --no-reload -vv"
+        ).format(listener_port, port, layer),
+        "isBackground": True,
+        "presentation": {
+            "reveal": "always",
+            "panel": "dedicated",
+        },
+        "problemMatcher": ROBOT_SERVER_PROBLEM_MATCHER,
+    }
+
+
+def robot_pabot_server_task_template(index, port, listener_port):
+    return {
+        "label": "Start Plone Test Server: pabot #{0}".format(index),
+        "type": "shell",
+        "command": (
+            "LISTENER_PORT={0} ZSERVER_PORT={1} "
+            "bin/robot-server ${{input:ploneTestingLayer}} --no-reload -vv"
+        ).format(listener_port, port),
+        "isBackground": True,
+        "presentation": {
+            "reveal": "silent",
+            "panel": "dedicated",
+        },
+        "problemMatcher": ROBOT_SERVER_PROBLEM_MATCHER,
+    }
+
+
+def robot_pabot_servers_task_template(server_tasks):
+    return {
+        "label": "Start Plone Test Servers: pabot",
+        "dependsOn": [t["label"] for t in server_tasks],
+        "dependsOrder": "parallel",
+        "problemMatcher": [],
+    }
+
+
+def robot_pabot_args_template(processes, python, worker):
+    return [
+        "--processes",
+        str(processes),
+        "--command",
+        python,
+        worker,
+        "--end-command",
+        "${input:robotSuites}",
+    ]
+
+
+def robot_pabot_task_template(python, args, env):
+    return {
+        "label": "Robot Framework: pabot",
+        "type": "process",
+        "command": python,
+        "args": ["-m", "pabot.pabot"] + args,
+        "options": {"env": env},
+        "dependsOn": ["Start Plone Test Servers: pabot"],
+        "presentation": {"reveal": "always", "panel": "shared"},
+        "problemMatcher": [],
+    }
+
+
+def robot_pabot_launch_template(args, env):
+    return {
+        "type": "debugpy",
+        "name": "Robot Framework: pabot",
+        "request": "launch",
+        "module": "pabot.pabot",
+        "args": args,
+        "console": "integratedTerminal",
+        "envFile": "${workspaceFolder}/.vscode/.env",
+        "env": env,
+        "preLaunchTask": "Start Plone Test Servers: pabot",
+    }
+
+
+ROBOT_SUITES_INPUT_TEMPLATE = {
+    "id": "robotSuites",
+    "type": "promptString",
+    "description": "Enter Robot Framework suites (file or directory)",
+    "default": "src",
+}
+
+MYPY_PROBLEM_MATCHER = {
+    "owner": "mypy",
+    "fileLocation": "absolute",
+    "pattern": {
+        "regexp": "^(.+?):(\\d+):(?:(\\d+):)?\\s+(error|warning|note):\\s+(.*)$",
+        "file": 1,
+        "line": 2,
+        "column": 3,
+        "severity": 4,
+        "message": 5,
+    },
+}
+
+
+def mypy_daemon_tasks_template(dmypy, status_file, config_file):
+    return [
+        {
+            "label": "mypy daemon: {0}".format(command),
+            "type": "process",
+            "command": dmypy,
+            "args": ["--status-file", status_file] + args,
+            "presentation": {"reveal": "silent", "panel": "shared"},
+            "problemMatcher": problem_matcher,
+        }
+        for command, args, problem_matcher in (
+            (
+                "start",
+                ["start", "--", "--config-file", config_file],
+                [],
+            ),
+            ("stop", ["stop"], []),
+            ("recheck", ["recheck"], MYPY_PROBLEM_MATCHER),
+        )
+    ]
+
+
+def debug_launch_template(script, program, args, rules):
+    return {
+        "type": "debugpy",
+        "name": "Python: {0}".format(" ".join([script] + args)),
+        "request": "launch",
+        "program": program,
+        "args": args,
+        "console": "integratedTerminal",
+        "envFile": "${workspaceFolder}/.vscode/.env",
+        "justMyCode": True,
+        "rules": rules,
+    }
+
+
+def test_tasks_template(script, args, python, changed_tests):
+    return [
+        {
+            "label": label,
+            "type": "process",
+            "command": command,
+            "args": command_args,
+            "group": "test",
+            "presentation": {"reveal": "always", "panel": "shared"},
+            "problemMatcher": [],
+        }
+        for label, command, command_args in (
+            ("Test: develop eggs", script, args),
+            (
+                "Test: develop eggs (layer)",
+                script,
+                args + ["--layer", "${input:testLayer}"],
+            ),
+            ("Test: changed packages", python, [changed_tests, script] + args[:2]),
+        )
+    ]
+
+
+def test_launch_template(name, program, args, rules):
+    return {
+        "type": "debugpy",
+        "name": name,
+        "request": "launch",
+        "program": program,
+        "args": args,
+        "console": "integratedTerminal",
+        "envFile": "${workspaceFolder}/.vscode/.env",
+        "justMyCode": True,
+        "subProcess": True,
+        "rules": rules,
+    }
+
+
+COVERAGE_RC_FILE = ".coveragerc"
+
+COVERAGE_XML_FILE = "coverage.xml"
+
+
+def coverage_tasks_template(python, rcfile, script, args, env):
+    return [
+        {
+            "label": "Coverage: run tests",
+            "type": "process",
+            "command": python,
+            "args": ["-m", "coverage", "run", "--rcfile", rcfile, script] + args,
+            "options": {"cwd": "${workspaceFolder}", "env": env},
+            "presentation": {"reveal": "always", "panel": "shared"},
+            "problemMatcher": [],
+        },
+        {
+            "label": "Coverage: combine",
+            "type": "shell",
+            "command": (
+                "{0} -m coverage combine --rcfile {1} && "
+                "{0} -m coverage xml --rcfile {1} && "
+                "{0} -m coverage report --rcfile {1}"
+            ).format(python, rcfile),
+            "options": {"cwd": "${workspaceFolder}"},
+            "presentation": {"reveal": "always", "panel": "shared"},
+            "problemMatcher": [],
+        },
+        {
+            "label": "Coverage: develop eggs",
+            "dependsOn": ["Coverage: run tests", "Coverage: combine"],
+            "dependsOrder": "sequence",
+            "group": "test",
+            "problemMatcher": [],
+        },
+    ]
+
+
+ZCML_PROBLEM_MATCHER = {
+    "owner": "zcml",
+    "fileLocation": "absolute",
+    "pattern": {
+        "regexp": "^(.+?\\.zcml):(\\d+):\\s+(error|warning):\\s+(.*)$",
+        "file": 1,
+        "line": 2,
+        "severity": 3,
+        "message": 4,
+    },
+}
+
+
+def zcml_task_template(script, project_root):
+    return {
+        "label": "ZCML: validate",
+        "type": "process",
+        "command": script,
+        "args": ["--project-root", project_root],
+        "presentation": {"reveal": "always", "panel": "shared"},
+        "problemMatcher": ZCML_PROBLEM_MATCHER,
+    }
+
+
+def profile_task_template(label, python, args):
+    return {
+        "label": label,
+        "type": "process",
+        "command": python,
+        "args": args,
+        "options": {"cwd": "${workspaceFolder}"},
+        "presentation": {"reveal": "always", "panel": "dedicated"},
+        "problemMatcher": [],
+    }
+
+
+def profile_launch_template(name, program, args):
+    return {
+        "type": "debugpy",
+        "name": name,
+        "request": "launch",
+        "program": program,
+        "args": args,
+        "cwd": "${workspaceFolder}",
+        "console": "integratedTerminal",
+        "envFile": "${workspaceFolder}/.vscode/.env",
+        "justMyCode": True,
+    }
+
+
+TEST_LAYER_INPUT_TEMPLATE = {
+    "id": "testLayer",
+    "type": "promptString",
+    "description": "Enter zope.testrunner layer (regular expression)",
+    "default": ".*",
+}
+
 ROBOT_SERVER_INPUT_TEMPLATE = {
     "id": "ploneTestingLayer",
     "type": "promptString",
@@ -78,6 +419,99 @@ def ensure_unicode(string):
     return u_string
 
 
+def default_cache_directory():
+    """User wide cache directory, outside of any project."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "collective.recipe.vscode")
+
+
+def canonical_path(path):
+    """Real, case normalized path without trailing separator."""
+    path = os.path.normcase(os.path.realpath(path))
+    return path.rstrip(os.sep) or os.sep
+
+
+def canonical_locations(locations):
+    """Deduplicate locations by their canonical path keeping the order and the
+    first spelling of each, so the outputs refer to the same paths the runtime
+    uses (i.e. not resolved symlinks). Number of collapsed (differently
+    written) duplicates is returned as well."""
+    canonical = OrderedDict()
+    unique = OrderedDict.fromkeys(locations)
+    for location in unique:
+        canonical.setdefault(canonical_path(location), location)
+    return list(canonical.values()), len(unique) - len(canonical)
+
+
+def interpreter_info(python, cache_directory):
+    """sys.path and version of the interpreter, probed once per interpreter
+    (path and mtime) and cached in cache directory."""
+    try:
+        key = "{0}:{1}".format(python, os.stat(python).st_mtime)
+    except OSError:
+        return None
+
+    cache_file = os.path.join(cache_directory, "interpreters.json")
+    try:
+        with io.open(cache_file, "r", encoding="utf-8") as fp:
+            cache = json.loads(fp.read())
+    except (IOError, ValueError):
+        cache = dict()
+
+    if key not in cache:
+        # interpreter's own sys.path, not what is added by environment
+        env = dict(os.environ)
+        env.pop("PYTHONPATH", None)
+        try:
+            output = subprocess.check_output(
+                [python, "-c", INTERPRETER_PROBE], env=env
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+        info = json.loads(ensure_unicode(output))
+        info["path"] = [canonical_path(p) for p in info["path"] if p]
+        # forget outdated results of the same interpreter
+        cache = dict(
+            (k, v) for k, v in cache.items() if k.rsplit(":", 1)[0] != python
+        )
+        cache[key] = info
+        if not os.path.exists(cache_directory):
+            os.makedirs(cache_directory)
+        with io.open(cache_file, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(cache, indent=2, sort_keys=True)))
+
+    return cache[key]
+
+
+def top_level_names(dist):
+    """Top level packages/modules of the distribution."""
+    if dist.has_metadata("top_level.txt"):
+        return [
+            name.strip()
+            for name in dist.get_metadata_lines("top_level.txt")
+            if name.strip()
+        ]
+    return []
+
+
+def mypy_paths(locations):
+    """Locations usable in mypy_path (MYPYPATH), mypy refuses site-packages."""
+    ignored = ("site-packages", "dist-packages")
+    return [p for p in locations if os.path.basename(p.rstrip(os.sep)) not in ignored]
+
+
+def terminal_platform():
+    """Platform suffix of terminal.integrated.env.* settings."""
+    if sys.platform.startswith("win"):
+        return "windows"
+    if sys.platform == "darwin":
+        return "osx"
+    return "linux"
+
+
 def find_executable_path(name):
     """ """
     try:
@@ -88,6 +522,141 @@ def find_executable_path(name):
         pass
 
 
+# Scanned eggs directories, reused by all recipe runs of the same process
+# (i.e. vscode-batch with shared eggs directory), by path and modification time.
+_environments = {}
+
+
+def directory_environment(path):
+    """Distributions found in the directory, scanned once while not changed."""
+    try:
+        key = (path, os.path.getmtime(path))
+    except OSError:
+        key = (path, None)
+    if key not in _environments:
+        _environments[key] = pkg_resources.Environment([path])
+    return _environments[key]
+
+
+def offline_working_set(requirements, search_path, versions=None):
+    """Working set of requirements from distributions found in search path
+    (eggs and develop-eggs directories) only, package indexes are never
+    contacted. Pinned versions are honoured."""
+    environment = pkg_resources.Environment([])
+    for path in search_path:
+        environment += directory_environment(path)
+    for project_name, version in (versions or {}).items():
+        # exact pins or (buildout's own) specifiers like >=2.0
+        if version[:1] not in "<>=!~":
+            version = "==" + version
+        requirement = pkg_resources.Requirement.parse(project_name + version)
+        for dist in list(environment[requirement.key]):
+            if dist not in requirement:
+                environment.remove(dist)
+
+    ws = pkg_resources.WorkingSet([])
+    try:
+        for dist in ws.resolve(
+            [pkg_resources.Requirement.parse(r) for r in requirements], environment
+        ):
+            ws.add(dist)
+    except pkg_resources.DistributionNotFound as exc:
+        required_by = getattr(exc, "requirers_str", "")
+        raise UserError(
+            "Offline resolution: {0} is not available locally (required by {1}), "
+            "run buildout online first or turn off offline-resolution.".format(
+                getattr(exc, "req", exc), required_by
+            )
+        )
+    except pkg_resources.VersionConflict as exc:
+        raise UserError("Offline resolution: {0}".format(exc.report()))
+    return ws
+
+
+def generated_task(task):
+    """Task generated by this recipe."""
+    return task.get("detail") == GENERATED_TAG
+
+
+def generated_configuration(configuration):
+    """Launch configuration generated by this recipe."""
+    presentation = configuration.get("presentation") or {}
+    return presentation.get("group") == GENERATED_TAG
+
+
+def remove_generated(settings_dir, labels=(), names=()):
+    """Remove generated tasks and launch configurations from .vscode/ but those
+    with given labels and names, inputs of this recipe are removed when nothing
+    refers to them anymore."""
+    input_ids = [
+        i["id"]
+        for i in (
+            ROBOT_SUITES_INPUT_TEMPLATE,
+            TEST_LAYER_INPUT_TEMPLATE,
+            ROBOT_SERVER_INPUT_TEMPLATE,
+        )
+    ]
+    for filename, key, generated, kept in (
+        ("tasks.json", "tasks", generated_task, lambda t: t.get("label") in labels),
+        (
+            "launch.json",
+            "configurations",
+            generated_configuration,
+            lambda c: c.get("name") in names,
+        ),
+    ):
+        path = os.path.join(settings_dir, filename)
+        try:
+            with io.open(path, "r", encoding="utf-8") as fp:
+                config = json.loads(fp.read())
+        except (IOError, ValueError):
+            continue
+        entries = [e for e in config.get(key, []) if not generated(e) or kept(e)]
+        used = json.dumps(entries)
+        inputs = [
+            i
+            for i in config.get("inputs", [])
+            if i.get("id") not in input_ids or "${{input:{0}}}".format(i["id"]) in used
+        ]
+        if entries == config.get(key, []) and inputs == config.get("inputs", []):
+            continue
+        config[key] = entries
+        if "inputs" in config:
+            config["inputs"] = inputs
+        with io.open(path, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(config, indent=4)))
+
+
+def remove_pyright_config(config_file):
+    """Remove keys set by this recipe from pyrightconfig.json, the file as well
+    when the user has no settings of their own in it."""
+    try:
+        with io.open(config_file, "r", encoding="utf-8") as fp:
+            config = json.loads(fp.read())
+    except (IOError, ValueError):
+        return
+    for key in PYRIGHT_CONFIG_KEYS:
+        config.pop(key, None)
+    if config:
+        with io.open(config_file, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(config, indent=4, sort_keys=True)))
+    else:
+        os.unlink(config_file)
+
+
+def load_paths(project_root):
+    """Resolved paths, those are written by the recipe, for command line tools."""
+    paths_file = os.path.join(project_root, ".vscode", PATHS_FILE)
+    try:
+        with io.open(paths_file, "r", encoding="utf-8") as fp:
+            return json.loads(fp.read())
+    except IOError:
+        raise UserError(
+            "{0} is not found, run buildout with collective.recipe.vscode "
+            "first.".format(paths_file)
+        )
+
+
 with io.open(
     os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings_mappings.json"),
     "r",
@@ -115,6 +684,10 @@ class Recipe:
         if not os.path.exists(self.settings_dir):
             os.makedirs(self.settings_dir)
 
+        # labels and names of the tasks and launch configurations generated
+        self.generated_labels = set()
+        self.generated_names = set()
+
         develop_eggs = []
 
         if self.options["ignore-develop"].lower() in ("yes", "true", "on", "1", "sure"):
@@ -129,6 +702,21 @@ class Recipe:
             p.strip() for p in self.options["packages"].splitlines() if p and p.strip()
         ]
 
+        self.resolved = None
+        if self.options["export-paths"].lower() in ("yes", "true", "on", "1", "sure"):
+            # Other parts substitute ${vscode:extra-paths} etc., so resolve early.
+            # Parts are not loaded here, as those could refer to us.
+            if not self.options.get("eggs"):
+                raise UserError(
+                    "{0}: export-paths requires eggs option.".format(self.name)
+                )
+            self.resolved = self._resolve_working_set()
+            eggs_locations, develop_eggs_locations, _, _ = self.resolved
+            self.options["extra-paths"] = "\n".join(eggs_locations)
+            self.options["develop-paths"] = "\n".join(develop_eggs_locations)
+            self.options["pythonpath"] = os.pathsep.join(eggs_locations)
+            return
+
         # Make all other recipes dependent on us so they run first to
         # ensure all implctly
         # referenced parts are loaded
@@ -142,6 +730,265 @@ class Recipe:
         on provided options.
         """
 
+        # already resolved, if paths are exported
+        resolved = self.resolved or self._resolve_working_set()
+        (
+            eggs_locations,
+            develop_eggs_locations,
+            develop_requirements,
+            distributions,
+        ) = resolved
+
+        try:
+            with io.open(
+                os.path.join(self.settings_dir, "settings.json"), "r", encoding="utf-8"
+            ) as fp:
+                json_text = fp.read()
+                existing_settings = json.loads(json_text)
+
+        except ValueError as e:
+            raise UserError(str(e))
+        except IOError:
+            existing_settings = dict()
+
+        vscode_settings = self._prepare_settings(
+            eggs_locations, develop_eggs_locations, existing_settings
+        )
+
+        self._write_project_file(vscode_settings, existing_settings)
+
+        # Write json file values only those are generated by this recipe.
+        # Also dodges (by giving fake like file) buildout to
+        # remove original settings.json file.
+        vs_generated_file = os.path.join(
+            self.settings_dir, "vs-recipe-generated-settings.json"
+        )
+        with io.open(vs_generated_file, "w", encoding="utf-8") as fp:
+            json_text = json.dumps(vscode_settings, indent=2, sort_keys=True)
+            fp.write(ensure_unicode(json_text))
+
+        # Resolved paths for command line tools (i.e. vscode-typecheck)
+        self._write_paths_file(
+            vscode_settings[mappings["python-path"]],
+            eggs_locations,
+            develop_eggs_locations,
+            develop_requirements,
+            distributions,
+        )
+
+        options = self.normalize_options()
+        pycache_prefix = self._pycache_prefix(options)
+        self.generated_labels.clear()
+        self.generated_names.clear()
+
+        if vscode_settings.get("robot.python.env"):
+            self._prepare_robot(vscode_settings, pycache_prefix, options)
+
+        if options["pyright-config"]:
+            self._write_pyright_config(develop_requirements)
+
+        installed = [vs_generated_file]
+        if options["zcml-index"]:
+            installed.extend(
+                self._install_script("vscode-zcml", "collective.recipe.vscode.zcml")
+            )
+
+        self._prepare_tasks(
+            vscode_settings,
+            eggs_locations,
+            develop_eggs_locations,
+            distributions,
+            options,
+        )
+        # i.e. option turned off, testing layer dropped or fewer pabot processes
+        remove_generated(self.settings_dir, self.generated_labels, self.generated_names)
+
+        steps = self._editor_steps(
+            vscode_settings, eggs_locations, distributions, pycache_prefix, options
+        )
+
+        if steps:
+            self._run_steps(steps, options)
+
+        return installed
+
+    update = install
+
+    def _prepare_robot(self, vscode_settings, pycache_prefix, options):
+        """Launch configurations and test server tasks for Robot Framework."""
+        pythonpath = vscode_settings["robot.python.env"]["PYTHONPATH"].replace(
+            "${PYTHONPATH}", "${env:PYTHONPATH}"
+        )
+        configurations = [
+            robot_lsp_launch_template(pythonpath)
+        ] + self._robot_layer_launch_configurations(pythonpath, options)
+        for configuration in configurations:
+            if pycache_prefix:
+                configuration["env"]["PYTHONPYCACHEPREFIX"] = pycache_prefix
+            if options["compact-settings"] and options["generate-envfile"]:
+                # PYTHONPATH from the single .env file
+                del configuration["env"]["PYTHONPATH"]
+                configuration["envFile"] = "${workspaceFolder}/.vscode/.env"
+        self._update_launch_file(configurations)
+        self._update_tasks_file(
+            [ROBOT_SERVER_TASK_TEMPLATE]
+            + [
+                robot_layer_server_task_template(layer, zope_port, listener_port)
+                for layer, zope_port, listener_port in self._robot_layers(options)
+            ],
+            [ROBOT_SERVER_INPUT_TEMPLATE],
+        )
+        # Parallel Robot Framework execution with pabot
+        if options["robot-pabot-enabled"]:
+            self._prepare_pabot(
+                vscode_settings[mappings["python-path"]], pythonpath, options
+            )
+
+    def _prepare_tasks(
+        self,
+        vscode_settings,
+        eggs_locations,
+        develop_eggs_locations,
+        distributions,
+        options,
+    ):
+        """Tasks and launch configurations of the enabled tools."""
+        # Debug configurations, those trace only develop eggs
+        if options["debug-enabled"]:
+            rules = self._debug_rules(eggs_locations, develop_eggs_locations)
+            self._update_launch_file(
+                [
+                    debug_launch_template(
+                        script, self._bin_script(script), args, rules
+                    )
+                    for script, args in options["debug-scripts"]
+                ]
+            )
+
+        # Parallel zope.testrunner tasks for develop eggs
+        if options["test-enabled"]:
+            self._prepare_tests(
+                vscode_settings[mappings["python-path"]],
+                distributions,
+                self._debug_rules(eggs_locations, develop_eggs_locations),
+                options,
+            )
+
+        # Coverage tasks measuring develop eggs only
+        if options["coverage-enabled"]:
+            self._prepare_coverage(
+                vscode_settings[mappings["python-path"]],
+                develop_eggs_locations,
+                distributions,
+                options,
+            )
+
+        # Tasks recording imported eggs for import-trace pruning
+        if options["import-trace"]:
+            import_trace = self._copy_script("import_trace.py")
+            self._update_tasks_file(
+                [
+                    profile_task_template(
+                        "Import trace: {0}".format(" ".join([script] + args)),
+                        vscode_settings[mappings["python-path"]],
+                        [import_trace, self._bin_script(script)] + args,
+                    )
+                    for script, args in options["import-trace-scripts"]
+                ]
+            )
+
+        # Profiling tasks and launch configurations
+        if options["profile-enabled"]:
+            self._prepare_profiling(vscode_settings[mappings["python-path"]], options)
+
+        # ZCML validation with vscode-zcml console script, installed by install
+        if options["zcml-index"]:
+            self._update_tasks_file(
+                [
+                    zcml_task_template(
+                        self._bin_script("vscode-zcml"), self.options["project-root"]
+                    )
+                ]
+            )
+
+        # Tasks for controlling mypy daemon
+        if options["mypy-enabled"] and options["mypy-daemon"]:
+            self._update_tasks_file(
+                mypy_daemon_tasks_template(
+                    vscode_settings[mappings["mypy-path"]],
+                    os.path.join(self.settings_dir, "dmypy.json"),
+                    os.path.join(self.settings_dir, "mypy.ini"),
+                )
+            )
+
+    def _editor_steps(
+        self, vscode_settings, eggs_locations, distributions, pycache_prefix, options
+    ):
+        """Steps only editor needs (indexes, caches), those may run in background."""
+        steps = []
+
+        if options["robot-libspec-cache"] and vscode_settings.get(
+            mappings["robot-python-env"]
+        ):
+            steps.append(
+                self._libspec_step(
+                    vscode_settings[mappings["python-path"]],
+                    eggs_locations,
+                    distributions,
+                )
+            )
+
+        if options["symbol-index"]:
+            steps.append(self._symbol_index_step(eggs_locations, distributions))
+
+        # ZCML registrations index, after the symbol index
+        if options["zcml-index"]:
+            steps.append(
+                [
+                    "zcml-index",
+                    "collective.recipe.vscode.zcml:build_index",
+                    {"index_dir": self.settings_dir, "locations": eggs_locations},
+                ]
+            )
+
+        # Bytecode of the working set into shared pycache prefix
+        if options["bytecode-precompile"]:
+            if pycache_prefix:
+                steps.append(
+                    self._bytecode_step(
+                        vscode_settings[mappings["python-path"]],
+                        eggs_locations,
+                        distributions,
+                        pycache_prefix,
+                    )
+                )
+            else:
+                self.logger.warning(
+                    "Bytecode precompilation needs Python 3.8+ ({0}), "
+                    "skipped.".format(options["python-path"])
+                )
+
+        # Keep caches of the project and the user within their budgets
+        if options["cache-gc"]:
+            steps.append(
+                [
+                    "cache-gc",
+                    "collective.recipe.vscode.cache:collect_caches",
+                    {
+                        "settings_dir": self.settings_dir,
+                        "cache_directory": options["cache-directory"],
+                        "budgets": options["cache-budgets"],
+                        "pycache_prefix": options["pycache-prefix"],
+                    },
+                ]
+            )
+
+        return steps
+
+    def _resolve_working_set(self):
+        """Find eggs locations, develop eggs locations, requirements of each
+        develop egg and distributions (location, version) from working set of
+        all (or given) eggs."""
         if self.options.get("eggs"):
             # Need working set for all eggs and zc.recipe.egg also
             parts = [
@@ -161,107 +1008,171 @@ class Recipe:
                     recipe, _ = recipe.split(":")
                 parts.append((part, recipe, options))
 
-        eggs_locations = set()
-        develop_eggs_locations = set()
+        eggs_locations = list()
+        develop_eggs_locations = list()
+        develop_requirements = dict()
+        distributions = OrderedDict()
         develop_eggs = os.listdir(self.buildout["buildout"]["develop-eggs-directory"])
         develop_eggs = [dev_egg[:-9] for dev_egg in develop_eggs]
 
+        # distributions of each project by location, with the part using it
+        candidates = OrderedDict()
+
         for part, recipe, options in parts:
-            egg = zc.recipe.egg.Egg(self.buildout, recipe, options)
-            try:
-                _, ws = egg.working_set()
-            except Exception as exc:  # noqa: B902
-                raise UserError(str(exc))
+            ws = self._working_set(recipe, options)
 
             for dist in ws.by_key.values():
 
                 project_name = dist.project_name
                 if project_name not in self.ignored_eggs:
-                    eggs_locations.add(dist.location)
+                    eggs_locations.append(dist.location)
+                    distributions[project_name] = {
+                        "location": canonical_path(dist.location),
+                        "version": dist.version,
+                        "develop": project_name in develop_eggs,
+                        "requires": sorted(r.project_name for r in dist.requires()),
+                        "top-level": top_level_names(dist),
+                    }
+                    candidates.setdefault(project_name, OrderedDict()).setdefault(
+                        distributions[project_name]["location"],
+                        (part, distributions[project_name]),
+                    )
                 if project_name in develop_eggs:
-                    develop_eggs_locations.add(dist.location)
+                    develop_eggs_locations.append(dist.location)
+                    develop_requirements.setdefault(
+                        canonical_path(dist.location), set()
+                    ).update(
+                        canonical_path(location)
+                        for location in self._requirements_locations(ws, dist)
+                    )
 
             for package in self.packages:
-                eggs_locations.add(package)
-
-        try:
-            with io.open(
-                os.path.join(self.settings_dir, "settings.json"), "r", encoding="utf-8"
-            ) as fp:
-                json_text = fp.read()
-                existing_settings = json.loads(json_text)
-
-        except ValueError as e:
-            raise UserError(str(e))
-        except IOError:
-            existing_settings = dict()
+                eggs_locations.append(package)
+
+        # Parts may use different versions of the same project
+        excluded = self._resolve_version_conflicts(candidates, distributions)
+        if excluded:
+            eggs_locations = [
+                location
+                for location in eggs_locations
+                if canonical_path(location) not in excluded
+            ]
+            develop_eggs_locations = [
+                location
+                for location in develop_eggs_locations
+                if canonical_path(location) not in excluded
+            ]
+            develop_requirements = dict(
+                (location, requirements - excluded)
+                for location, requirements in develop_requirements.items()
+                if location not in excluded
+            )
 
-        vscode_settings = self._prepare_settings(
-            list(eggs_locations), list(develop_eggs_locations), existing_settings
+        # The same egg could be reached through symlinks, relative paths etc.
+        eggs_locations, collapsed = canonical_locations(eggs_locations)
+        if collapsed:
+            self.logger.info(
+                "Collapsed {0} duplicate egg location(s).".format(collapsed)
+            )
+        # one spelling of each location everywhere, the one of eggs locations
+        spelled = dict(
+            (canonical_path(location), location) for location in eggs_locations
         )
 
-        self._write_project_file(vscode_settings, existing_settings)
+        def spelling(location):
+            return spelled.get(canonical_path(location), location)
 
-        # Write json file values only those are generated by this recipe.
-        # Also dodges (by giving fake like file) buildout to
-        # remove original settings.json file.
-        vs_generated_file = os.path.join(
-            self.settings_dir, "vs-recipe-generated-settings.json"
+        develop_eggs_locations = [
+            spelling(location)
+            for location in canonical_locations(develop_eggs_locations)[0]
+        ]
+        develop_requirements = dict(
+            (spelling(location), set(spelling(r) for r in requirements))
+            for location, requirements in develop_requirements.items()
+        )
+        for dist in distributions.values():
+            dist["location"] = spelling(dist["location"])
+
+        return (
+            eggs_locations,
+            develop_eggs_locations,
+            develop_requirements,
+            distributions,
         )
-        with io.open(vs_generated_file, "w", encoding="utf-8") as fp:
-            json_text = json.dumps(vscode_settings, indent=2, sort_keys=True)
-            fp.write(ensure_unicode(json_text))
 
-        # Update .vscode/launch.js and .vscode/tasks.js for Robot testing
-        if vscode_settings.get("robot.python.env"):
-            vs_launch_file = os.path.join(self.settings_dir, "launch.json")
-            if os.path.exists(vs_launch_file):
-                with io.open(vs_launch_file, "r", encoding="utf-8") as fp:
-                    launch_json = json.loads(fp.read())
-            else:
-                launch_json = dict(version="0.2.0")
-            launch_json.setdefault("configurations", [])
-            launch_json["configurations"] = [
-                c for c in launch_json["configurations"]
-                if c["type"] != "robotframwork-lsp" and
-                c["name"] != "Robot Framework: Launch Template"
-            ] + [
-                ROBOT_LSP_LAUNCH_TEMPLATE(
-                    vscode_settings["robot.python.env"]["PYTHONPATH"].replace(
-                        '${PYTHONPATH}', '${env:PYTHONPATH}'
-                    )
+    def _resolve_version_conflicts(self, candidates, distributions):
+        """Pick one distribution for projects found in more than one location
+        (i.e. parts pin different versions) by version-conflict-policy. Returns
+        locations to be excluded from editor paths."""
+        policy = self.options["version-conflict-policy"]
+        if policy not in ("newest", "oldest", "primary"):
+            raise UserError(
+                "version-conflict-policy must be newest, oldest or primary, "
+                "not {0}".format(policy)
+            )
+        primary_part = self.options["primary-part"]
+        if policy == "primary" and not primary_part:
+            raise UserError("version-conflict-policy primary requires primary-part")
+
+        chosen_locations = set()
+        conflict_locations = set()
+        for project_name, found in candidates.items():
+            if len(found) == 1:
+                chosen_locations.update(found)
+                continue
+            conflict_locations.update(found)
+            by_version = sorted(
+                found.items(),
+                key=lambda item: pkg_resources.parse_version(item[1][1]["version"]),
+            )
+            location, (part, dist) = by_version[0 if policy == "oldest" else -1]
+            if policy == "primary":
+                for candidate_location, (candidate_part, candidate) in found.items():
+                    if candidate_part == primary_part:
+                        location, part, dist = (
+                            candidate_location,
+                            candidate_part,
+                            candidate,
+                        )
+                        break
+            chosen_locations.add(location)
+            distributions[project_name] = dist
+            self.logger.warning(
+                "Version conflict of {0}: {1}, using {2} of part {3}.".format(
+                    project_name,
+                    ", ".join(
+                        "{0} (part {1})".format(d["version"], p)
+                        for p, d in found.values()
+                    ),
+                    dist["version"],
+                    part,
                 )
-            ]
-            with io.open(vs_launch_file, "w", encoding="utf-8") as fp:
-                fp.write(json.dumps(launch_json, indent=4))
+            )
 
-            vs_tasks_file = os.path.join(self.settings_dir, "tasks.json")
-            if os.path.exists(vs_tasks_file):
-                with io.open(vs_tasks_file, "r", encoding="utf-8") as fp:
-                    tasks_json = json.loads(fp.read())
-            else:
-                tasks_json = dict(version="2.0.0")
-            tasks_json.setdefault("tasks", [])
-            tasks_json.setdefault("inputs", [])
-            tasks_json["tasks"] = [
-                t for t in tasks_json["tasks"]
-                if t["type"] != "shell" and
-                t["name"] != "Plone: Start Test Server"
-            ] + [
-                ROBOT_SERVER_TASK_TEMPLATE
+        # other distributions may be in the same location (i.e. site-packages)
+        return conflict_locations - chosen_locations
+
+    def _working_set(self, recipe, options):
+        """Working set of the part, with offline-resolution only from the local
+        eggs and develop-eggs directories."""
+        offline = self.options["offline-resolution"]
+        if offline.lower() in ("yes", "true", "on", "1", "sure"):
+            buildout = self.buildout["buildout"]
+            requirements = [
+                r.strip() for r in options.get("eggs", recipe).split("\n") if r.strip()
             ]
-            tasks_json["inputs"] = [
-                i for i in tasks_json["inputs"]
-                if i["id"] != "ploneTestingLayer"
-            ] + [
-                ROBOT_SERVER_INPUT_TEMPLATE
-            ]
-            with io.open(vs_tasks_file, "w", encoding="utf-8") as fp:
-                fp.write(json.dumps(tasks_json, indent=4))
-
-        return vs_generated_file
+            return offline_working_set(
+                requirements,
+                [buildout["develop-eggs-directory"], buildout["eggs-directory"]],
+                zc.buildout.easy_install.default_versions(),
+            )
 
-    update = install
+        egg = zc.recipe.egg.Egg(self.buildout, recipe, options)
+        try:
+            _, ws = egg.working_set()
+        except Exception as exc:  # noqa: B902
+            raise UserError(str(exc))
+        return ws
 
     def normalize_options(self):
         """This method is simply doing tranformation of cfg string to python datatype.
@@ -286,21 +1197,95 @@ class Recipe:
 
         # mypy check
         self._normalize_boolean("mypy-enabled", options)
+        self._normalize_boolean("mypy-daemon", options)
 
         # pep8 check: Issue#1
         self._normalize_boolean("pep8-enabled", options)
 
         # generate .env file
         self._normalize_boolean("generate-envfile", options)
+        self._normalize_boolean("compact-settings", options)
 
         # robotframework lsp pythonpath
         self._normalize_boolean("robot-enabled", options)
+        self._normalize_boolean("robot-libspec-cache", options)
+        options["robot-testing-layers"] = options["robot-testing-layers"].split()
+        options["robot-server-port"] = int(options["robot-server-port"])
+        options["robot-listener-port"] = int(options["robot-listener-port"])
+        self._normalize_boolean("robot-pabot-enabled", options)
+        options["robot-pabot-processes"] = int(
+            options["robot-pabot-processes"] or multiprocessing.cpu_count()
+        )
+        options["robot-pabot-port"] = int(options["robot-pabot-port"])
+        if options["robot-pabot-listener-port"]:
+            options["robot-pabot-listener-port"] = int(
+                options["robot-pabot-listener-port"]
+            )
+        else:
+            # after the listener ports of testing layers
+            options["robot-pabot-listener-port"] = max(
+                50001,
+                options["robot-listener-port"] + len(options["robot-testing-layers"]),
+            )
+        if options["robot-pabot-enabled"]:
+            self._check_robot_ports(options)
+
+        # leave out interpreter's sys.path from editor path lists
+        self._normalize_boolean("prune-interpreter-paths", options)
+
+        # debugger launch configurations
+        self._normalize_boolean("debug-enabled", options)
+        options["debug-scripts"] = [
+            (line.split()[0], line.split()[1:])
+            for line in options["debug-scripts"].splitlines()
+            if line.strip()
+        ]
+
+        self._normalize_boolean("coverage-enabled", options)
+        self._normalize_boolean("background-steps", options)
+        self._normalize_boolean("cache-gc", options)
+        self._normalize_boolean("bytecode-precompile", options)
+        try:
+            options["cache-budgets"] = parse_budgets(options["cache-budgets"])
+        except ValueError as exc:
+            raise UserError(str(exc))
+
+        # profiling of scripts
+        self._normalize_boolean("profile-enabled", options)
+        options["profile-scripts"] = [
+            (line.split()[0], line.split()[1:])
+            for line in options["profile-scripts"].splitlines()
+            if line.strip()
+        ]
+
+        # editor paths pruned by runtime import trace
+        self._normalize_boolean("import-trace", options)
+        options["import-trace-scripts"] = [
+            (line.split()[0], line.split()[1:])
+            for line in options["import-trace-scripts"].splitlines()
+            if line.strip()
+        ]
+
+        # symbol index of eggs for fast navigation
+        self._normalize_boolean("symbol-index", options)
+        self._normalize_boolean("zcml-index", options)
+        self._normalize_boolean("test-enabled", options)
+        options["test-processes"] = int(
+            options["test-processes"] or multiprocessing.cpu_count()
+        )
+
+        # pyrightconfig.json with per develop egg execution environments
+        self._normalize_boolean("pyright-config", options)
 
         # autocomplete
         options["autocomplete-use-omelette"] = self.options[
             "autocomplete-use-omelette"
         ].lower() in ("yes", "y", "true", "t", "on", "1", "sure")
 
+        # fill in performance relevant linter arguments
+        self._normalize_boolean("performance-defaults", options)
+        self._normalize_boolean("mypy-sqlite-cache", options)
+
         # Parse linter arguments
         if "pylint-args" in options:
             options["pylint-args"] = self._normalize_linter_args(options["pylint-args"])
@@ -320,8 +1305,40 @@ class Recipe:
         if "pep8-args" in options:
             options["pep8-args"] = self._normalize_linter_args(options["pep8-args"])
 
+        if options["performance-defaults"]:
+            self._add_performance_linter_args(options)
+
         return options
 
+    def _add_performance_linter_args(self, options):
+        """Parallelize and cache linters of enabled linters, user specified
+        arguments (also negated ones, i.e. --no-sqlite-cache) always win."""
+        jobs = "--jobs={0}".format(multiprocessing.cpu_count())
+        mypy_cache = "--cache-dir={0}".format(
+            os.path.join(options["cache-directory"], "mypy")
+        )
+        defaults = [
+            ("pylint", ("--jobs", "-j"), jobs),
+            ("flake8", ("--jobs", "-j"), jobs),
+            ("mypy", ("--cache-dir",), mypy_cache),
+        ]
+        if options["mypy-sqlite-cache"]:
+            defaults.append(("mypy", ("--sqlite-cache",), "--sqlite-cache"))
+
+        for name, flags, arg in defaults:
+            if not options.get("{name}-enabled".format(name=name)):
+                continue
+            flags = flags + tuple(
+                "--" + flag[len("--no-"):]
+                if flag.startswith("--no-")
+                else "--no-" + flag[len("--"):]
+                for flag in flags
+                if flag.startswith("--")
+            )
+            linter_args = options["{name}-args".format(name=name)]
+            if not any(a.startswith(flags) for a in linter_args):
+                linter_args.append(arg)
+
     def _normalize_linter_args(self, args_lines):
         """ """
         args = list()
@@ -377,6 +1394,8 @@ class Recipe:
         self.options.setdefault("mypy-enabled", "False")
         self.options.setdefault("mypy-path", "")
         self.options.setdefault("mypy-args", "")
+        self.options.setdefault("mypy-daemon", "False")
+        self.options.setdefault("dmypy-path", "")
         self.options.setdefault("pep8-enabled", "False")
         self.options.setdefault("pep8-path", "")
         self.options.setdefault("pep8-args", "")
@@ -390,7 +1409,45 @@ class Recipe:
         self.options.setdefault("ignores", "")
         self.options.setdefault("packages", "")
         self.options.setdefault("generate-envfile", "True")
+        self.options.setdefault("compact-settings", "False")
         self.options.setdefault("robot-enabled", "False")
+        self.options.setdefault("robot-libspec-cache", "False")
+        self.options.setdefault("robot-testing-layers", "")
+        self.options.setdefault("robot-server-port", "55001")
+        self.options.setdefault("robot-listener-port", "49999")
+        self.options.setdefault("robot-pabot-enabled", "False")
+        self.options.setdefault("robot-pabot-processes", "")
+        self.options.setdefault("robot-pabot-port", "56001")
+        self.options.setdefault("robot-pabot-listener-port", "")
+        self.options.setdefault("export-paths", "False")
+        self.options.setdefault("prune-interpreter-paths", "False")
+        self.options.setdefault("pyright-config", "False")
+        self.options.setdefault("symbol-index", "False")
+        self.options.setdefault("zcml-index", "False")
+        self.options.setdefault("test-enabled", "False")
+        self.options.setdefault("coverage-enabled", "False")
+        self.options.setdefault("background-steps", "True")
+        self.options.setdefault("cache-gc", "False")
+        self.options.setdefault("cache-budgets", "")
+        self.options.setdefault("offline-resolution", "False")
+        self.options.setdefault("profile-enabled", "False")
+        self.options.setdefault("import-trace", "False")
+        self.options.setdefault("version-conflict-policy", "newest")
+        self.options.setdefault("primary-part", "")
+        self.options.setdefault("import-trace-scripts", "test\ninstance fg")
+        self.options.setdefault("profile-scripts", "instance fg\ntest")
+        self.options.setdefault("py-spy-path", "")
+        self.options.setdefault("test-script", "test")
+        self.options.setdefault("test-processes", "")
+        self.options.setdefault("debug-enabled", "False")
+        self.options.setdefault("debug-scripts", "instance fg\ntest")
+        self.options.setdefault("performance-defaults", "False")
+        self.options.setdefault("mypy-sqlite-cache", "False")
+        self.options.setdefault("cache-directory", default_cache_directory())
+        self.options.setdefault("bytecode-precompile", "False")
+        self.options.setdefault(
+            "pycache-prefix", os.path.join(self.options["cache-directory"], "pycache")
+        )
 
     def _prepare_settings(
         self, eggs_locations, develop_eggs_locations, existing_settings
@@ -403,18 +1460,18 @@ class Recipe:
             options["python-path"]
         )
 
-        settings[mappings["autocomplete-extrapaths"]] = eggs_locations
+        settings[mappings["autocomplete-extrapaths"]] = self._editor_locations(
+            eggs_locations, options
+        )
 
+        pythonpath = os.pathsep.join(
+            [self._settings_location(p, options) for p in eggs_locations]
+            + ["${PYTHONPATH}"]
+        )
         if options["generate-envfile"]:
-            path = os.path.join(self.settings_dir, ".env")
-            settings["python.envFile"] = path
-            self._write_env_file(eggs_locations, path)
-
-            # Also need terminal.integrated.env.* to make debugging work
-            pythonpath = os.pathsep.join(eggs_locations + ["${PYTHONPATH}"])
-            settings["terminal.integrated.env.linux"] = dict(PYTHONPATH=pythonpath)
-            settings["terminal.integrated.env.osx"] = dict(PYTHONPATH=pythonpath)
-            settings["terminal.integrated.env.windows"] = dict(PYTHONPATH=pythonpath)
+            self._prepare_environment_settings(
+                settings, eggs_locations, pythonpath, existing_settings, options
+            )
 
         if options["autocomplete-use-omelette"]:
             # Add the omelette and the development eggs to the jedi list.
@@ -424,16 +1481,50 @@ class Recipe:
             # inspecting the full module not just the individual file.
             settings[mappings["autocomplete-extrapaths"]] = [
                 options["omelette-location"]
-            ] + develop_eggs_locations
+            ] + self._editor_locations(develop_eggs_locations, options)
 
         # Needed for pylance
         settings[mappings["analysis-extrapaths"]] = settings[
             mappings["autocomplete-extrapaths"]
         ]
+        if options["import-trace"]:
+            settings[mappings["analysis-extrapaths"]] = self._traced_locations(
+                settings[mappings["analysis-extrapaths"]],
+                eggs_locations,
+                develop_eggs_locations,
+            )
+
+        if options["compact-settings"]:
+            settings[mappings["analysis-extrapaths"]] = [
+                self._settings_location(p, options)
+                for p in settings[mappings["analysis-extrapaths"]]
+            ]
+            if not options["jedi-enabled"]:
+                # only Jedi reads autoComplete.extraPaths
+                del settings[mappings["autocomplete-extrapaths"]]
+                existing_settings.pop(mappings["autocomplete-extrapaths"], None)
 
         # Needed for robotframework-slp
         if "robot-enabled" in self.user_options and options["robot-enabled"]:
             settings[mappings["robot-python-env"]] = dict(PYTHONPATH=pythonpath)
+            # robotframework-lsp picks up .libspec files in its pythonpath, the
+            # libspec directory is merged into user's own entries
+            libspec_dir = os.path.join(self.settings_dir, "libspec")
+            robot_pythonpath = existing_settings.get(mappings["robot-pythonpath"], [])
+            if not isinstance(robot_pythonpath, list):
+                robot_pythonpath = [robot_pythonpath]
+            robot_pythonpath = [p for p in robot_pythonpath if p != libspec_dir]
+            if options["robot-libspec-cache"]:
+                robot_pythonpath.append(libspec_dir)
+            if robot_pythonpath:
+                settings[mappings["robot-pythonpath"]] = robot_pythonpath
+            else:
+                existing_settings.pop(mappings["robot-pythonpath"], None)
+
+        # Needed for coverage-gutters
+        if options["coverage-enabled"]:
+            settings[mappings["coverage-basedir"]] = ".vscode"
+            settings[mappings["coverage-filenames"]] = [COVERAGE_XML_FILE]
 
         # Look on Jedi
         if "jedi-enabled" in self.user_options and options["jedi-enabled"]:
@@ -469,6 +1560,9 @@ class Recipe:
         self._sanitize_existing_linter_settings(existing_settings, "mypy", options)
         self._prepare_linter_settings(settings, "mypy", options)
 
+        if options["mypy-enabled"] and options["mypy-daemon"]:
+            self._prepare_mypy_daemon_settings(settings, eggs_locations, options)
+
         # Setup black, something more that others
         if "black-enabled" in self.user_options and options["black-enabled"]:
             settings[mappings["formatting-provider"]] = "black"
@@ -483,6 +1577,133 @@ class Recipe:
 
         return settings
 
+    def _prepare_environment_settings(
+        self, settings, eggs_locations, pythonpath, existing_settings, options
+    ):
+        """.env file and terminal environment settings."""
+        path = os.path.join(self.settings_dir, ".env")
+        settings["python.envFile"] = path
+        environment = self._tools_environment(options)
+        self._write_env_file(eggs_locations, path, environment)
+
+        if options["compact-settings"]:
+            # Python extension injects .env (PYTHONPATH included) into
+            # terminals, other platforms' settings are left out
+            settings["python.terminal.useEnvFile"] = True
+            for platform in ("linux", "osx", "windows"):
+                key = "terminal.integrated.env." + platform
+                if platform == terminal_platform() and environment:
+                    settings[key] = environment
+                else:
+                    existing_settings.pop(key, None)
+        else:
+            # Also need terminal.integrated.env.* to make debugging work
+            environment["PYTHONPATH"] = pythonpath
+            settings["terminal.integrated.env.linux"] = dict(environment)
+            settings["terminal.integrated.env.osx"] = dict(environment)
+            settings["terminal.integrated.env.windows"] = dict(environment)
+
+    def _traced_locations(self, locations, eggs_locations, develop_eggs_locations):
+        """Eggs those were not imported by the traced command are dropped
+        (develop eggs and other paths are kept), .env still has all of them.
+        Eggs not in the path of the traced command (i.e. upgraded since) are
+        kept until traced again."""
+        trace_file = os.path.join(self.settings_dir, IMPORT_TRACE_FILE)
+        try:
+            with io.open(trace_file, "r", encoding="utf-8") as fp:
+                trace = json.loads(fp.read())
+            traced = set(trace["locations"])
+            # traces without path are of older versions, nothing is known
+            available = set(trace.get("path", traced))
+        except (IOError, ValueError, KeyError):
+            self.logger.info(
+                "No import trace in {0}, run an import trace task first.".format(
+                    trace_file
+                )
+            )
+            return locations
+
+        # trace has canonical paths, locations are kept as spelled
+        traced = set(canonical_path(location) for location in traced)
+        available = set(canonical_path(location) for location in available)
+        droppable = (
+            set(canonical_path(location) for location in eggs_locations) & available
+        ) - set(canonical_path(location) for location in develop_eggs_locations)
+        droppable -= traced
+        kept = [
+            location
+            for location in locations
+            if canonical_path(location) not in droppable
+        ]
+        self.logger.info(
+            "Import trace: dropped {0} of {1} egg location(s) from analysis "
+            "extraPaths.".format(len(locations) - len(kept), len(eggs_locations))
+        )
+        return kept
+
+    def _editor_locations(self, locations, options):
+        """Locations for editor path lists, optionally without those which are
+        already in sys.path of the interpreter (would be indexed twice)."""
+        if not options["prune-interpreter-paths"]:
+            return locations
+
+        info = interpreter_info(
+            self._resolve_executable_path(options["python-path"]),
+            options["cache-directory"],
+        )
+        if info is None:
+            self.logger.warning(
+                "Could not probe sys.path of {0}".format(options["python-path"])
+            )
+            return locations
+
+        interpreter_paths = set(info["path"])
+        editor_locations = [
+            location
+            for location in locations
+            if canonical_path(location) not in interpreter_paths
+        ]
+        if len(editor_locations) < len(locations):
+            self.logger.info(
+                "Left out {0} location(s) provided by the interpreter.".format(
+                    len(locations) - len(editor_locations)
+                )
+            )
+        return editor_locations
+
+    def _prepare_mypy_daemon_settings(self, settings, eggs_locations, options):
+        """Run mypy through dmypy, so that type checking on save is incremental.
+        mypy_path of generated config comes from computed eggs locations (not
+        site-packages, mypy would exit)."""
+        config_file = os.path.join(self.settings_dir, "mypy.ini")
+        with io.open(config_file, "w", encoding="utf-8") as fp:
+            fp.write(
+                ensure_unicode(
+                    "[mypy]\nmypy_path = {paths}\n".format(
+                        paths=os.pathsep.join(mypy_paths(eggs_locations))
+                    )
+                )
+            )
+
+        dmypy_executable = options["dmypy-path"]
+        if not dmypy_executable:
+            mypy_executable = settings.get(mappings["mypy-path"], "")
+            dmypy_executable = os.path.join(os.path.dirname(mypy_executable), "dmypy")
+            if not mypy_executable or not os.path.exists(dmypy_executable):
+                dmypy_executable = find_executable_path("dmypy") or "dmypy"
+
+        settings[mappings["mypy-path"]] = self._resolve_executable_path(
+            dmypy_executable
+        )
+        settings[mappings["mypy-args"]] = [
+            "--status-file",
+            os.path.join(self.settings_dir, "dmypy.json"),
+            "run",
+            "--",
+            "--config-file",
+            config_file,
+        ] + options["mypy-args"]
+
     def _prepare_linter_settings(self, settings, name, options, allow_key_error=False):
         """All linter related settings are done by this method."""
         linter_enabled = "{name}-enabled".format(name=name)
@@ -511,9 +1732,565 @@ class Recipe:
                 linter_executable
             )
 
-        if linter_args in self.user_options and options[linter_args]:
+        if options[linter_args] and (
+            linter_args in self.user_options or options["performance-defaults"]
+        ):
             settings[mappings[linter_args]] = options[linter_args]
 
+    def _requirements_locations(self, ws, dist):
+        """Locations of all (recursive) requirements of the distribution,
+        found in working set."""
+        locations = set()
+        seen = set()
+        stack = [dist]
+        while stack:
+            dist = stack.pop()
+            if dist.key in seen:
+                continue
+            seen.add(dist.key)
+            if dist.project_name not in self.ignored_eggs:
+                locations.add(dist.location)
+            for requirement in dist.requires():
+                required = ws.by_key.get(requirement.key)
+                if required is not None:
+                    stack.append(required)
+        return locations
+
+    def _settings_location(self, path, options):
+        """Location for settings, relative to ${workspaceFolder} in compact mode
+        (if it is inside project root)."""
+        if not options["compact-settings"]:
+            return path
+        return self._workspace_path(path)
+
+    def _workspace_path(self, path):
+        """Path relative to ${workspaceFolder}, if it is inside project root."""
+        relpath = self._workspace_relative(path)
+        if os.path.isabs(relpath):
+            return path
+        if relpath == os.curdir:
+            return "${workspaceFolder}"
+        return "${workspaceFolder}/" + relpath.replace(os.sep, "/")
+
+    def _install_script(self, name, module):
+        """Console script of this recipe into bin-directory, it runs with the
+        packages buildout has loaded the recipe with. Returns the installed
+        files."""
+        bin_directory = self.buildout["buildout"]["bin-directory"]
+        if not os.path.isdir(bin_directory):
+            os.makedirs(bin_directory)
+        return zc.buildout.easy_install.scripts(
+            [(name, module, "main")],
+            pkg_resources.working_set,
+            sys.executable,
+            bin_directory,
+        )
+
+    def _bin_script(self, name):
+        """Script of buildout's bin-directory, for tasks and launch configurations."""
+        return self._workspace_path(
+            os.path.join(self.buildout["buildout"]["bin-directory"], name)
+        )
+
+    def _workspace_relative(self, path):
+        """Path relative to project root (if it is inside), for portable configs.
+        Compared canonically, either one could be written through a symlink."""
+        try:
+            relpath = os.path.relpath(
+                os.path.realpath(path), os.path.realpath(self.options["project-root"])
+            )
+        except ValueError:
+            # i.e. different drive on windows
+            return path
+        if relpath == os.pardir or relpath.startswith(os.pardir + os.sep):
+            return path
+        return relpath
+
+    def _write_pyright_config(self, develop_requirements):
+        """Generate pyrightconfig.json, each develop egg has own execution
+        environment with extra paths from its requirements only."""
+        config_file = os.path.join(self.options["project-root"], "pyrightconfig.json")
+        try:
+            with io.open(config_file, "r", encoding="utf-8") as fp:
+                config = json.loads(fp.read())
+        except ValueError as e:
+            raise UserError(str(e))
+        except IOError:
+            config = dict()
+
+        buildout = self.buildout["buildout"]
+        config["exclude"] = [
+            self._workspace_relative(path)
+            for path in (
+                buildout["eggs-directory"],
+                buildout["develop-eggs-directory"],
+                buildout["parts-directory"],
+                os.path.join(buildout["directory"], "var"),
+            )
+        ] + ["**/node_modules", "**/__pycache__", "**/.*"]
+
+        environments = []
+        for location, requirements in sorted(develop_requirements.items()):
+            extra_paths = sorted(
+                requirement
+                for requirement in requirements
+                if canonical_path(requirement) != canonical_path(location)
+            ) + self.packages
+            environments.append(
+                {
+                    "root": self._workspace_relative(location),
+                    "extraPaths": [self._workspace_relative(p) for p in extra_paths],
+                }
+            )
+        config["executionEnvironments"] = environments
+
+        with io.open(config_file, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(config, indent=4, sort_keys=True)))
+
+    def _robot_layers(self, options):
+        """Testing layers with their own Zope server and listener ports."""
+        return [
+            (
+                layer,
+                options["robot-server-port"] + index,
+                options["robot-listener-port"] + index,
+            )
+            for index, layer in enumerate(options["robot-testing-layers"])
+        ]
+
+    def _check_robot_ports(self, options):
+        """Test servers of testing layers and pabot processes could run at the
+        same time, so their port ranges must not overlap."""
+        layers = len(options["robot-testing-layers"])
+        processes = options["robot-pabot-processes"]
+        for kind, layer_option, pabot_option in (
+            ("Zope server", "robot-server-port", "robot-pabot-port"),
+            ("Robot listener", "robot-listener-port", "robot-pabot-listener-port"),
+        ):
+            layer_port, pabot_port = options[layer_option], options[pabot_option]
+            if layer_port < pabot_port + processes and pabot_port < layer_port + layers:
+                raise UserError(
+                    "{0} ports of testing layers ({1}-{2}) and pabot processes "
+                    "({3}-{4}) overlap, change {5} or {6}".format(
+                        kind,
+                        layer_port,
+                        layer_port + layers - 1,
+                        pabot_port,
+                        pabot_port + processes - 1,
+                        layer_option,
+                        pabot_option,
+                    )
+                )
+
+    def _robot_layer_launch_configurations(self, pythonpath, options):
+        """Launch configurations, those use already running (warm) test server
+        of the testing layer."""
+        configurations = []
+        for layer, zope_port, listener_port in self._robot_layers(options):
+            configuration = robot_lsp_launch_template(pythonpath)
+            configuration["name"] = "Robot Framework: {0}".format(
+                layer.split(".")[-1]
+            )
+            configuration["env"]["LISTENER_PORT"] = listener_port
+            zope_port_variable = "ZOPE_port:{0}".format(zope_port)
+            configuration["args"] = [
+                zope_port_variable if arg.startswith("ZOPE_port:") else arg
+                for arg in configuration["args"]
+            ]
+            configuration["preLaunchTask"] = robot_layer_server_task_template(
+                layer, zope_port, listener_port
+            )["label"]
+            configurations.append(configuration)
+        return configurations
+
+    def _prepare_pabot(self, python, pythonpath, options):
+        """Tasks and launch configuration to run Robot Framework suites with pabot,
+        each worker has its own (not conflicting) Zope server and listener port."""
+        worker = self._copy_script("pabot_worker.py")
+        processes = options["robot-pabot-processes"]
+        env = {
+            "PABOT_ZOPE_PORT": str(options["robot-pabot-port"]),
+            "PABOT_LISTENER_PORT": str(options["robot-pabot-listener-port"]),
+        }
+        server_tasks = [
+            robot_pabot_server_task_template(
+                index,
+                options["robot-pabot-port"] + index,
+                options["robot-pabot-listener-port"] + index,
+            )
+            for index in range(processes)
+        ]
+        args = robot_pabot_args_template(processes, python, worker)
+
+        task_env = dict(env, PYTHONPATH=pythonpath)
+        self._update_tasks_file(
+            server_tasks
+            + [
+                robot_pabot_servers_task_template(server_tasks),
+                robot_pabot_task_template(python, args, task_env),
+            ],
+            [ROBOT_SERVER_INPUT_TEMPLATE, ROBOT_SUITES_INPUT_TEMPLATE],
+        )
+        self._update_launch_file(
+            [robot_pabot_launch_template(args, env)], [ROBOT_SUITES_INPUT_TEMPLATE]
+        )
+
+    def _prepare_tests(self, python, distributions, rules, options):
+        """Tasks and launch configurations running zope.testrunner in parallel
+        (-j) for develop eggs, or only for those with uncommitted changes."""
+        script, args = self._test_command(distributions, options)
+        changed_tests = self._copy_script("changed_tests.py")
+
+        self._update_tasks_file(
+            test_tasks_template(script, args, python, changed_tests),
+            [TEST_LAYER_INPUT_TEMPLATE],
+        )
+        self._update_launch_file(
+            [
+                test_launch_template("Test: develop eggs", script, args, rules),
+                test_launch_template(
+                    "Test: changed packages",
+                    changed_tests,
+                    [script] + args[:2],
+                    rules,
+                ),
+            ]
+        )
+
+    def _test_command(self, distributions, options):
+        """zope.testrunner script and arguments for parallel run of develop eggs."""
+        script = self._bin_script(options["test-script"])
+        args = ["-j", str(options["test-processes"])]
+        for name, dist in distributions.items():
+            if dist["develop"]:
+                # -s takes packages, not distribution names
+                for package in dist.get("top-level") or [name]:
+                    args.extend(["-s", package])
+        return script, args
+
+    def _prepare_coverage(self, python, develop_eggs_locations, distributions, options):
+        """.coveragerc limited to develop eggs in parallel mode and tasks to run
+        tests under coverage, combine the results and write xml report for the
+        coverage gutters. Python 3.12+ uses sys.monitoring based core."""
+        rcfile = os.path.join(self.settings_dir, COVERAGE_RC_FILE)
+        lines = ["[run]", "source ="]
+        lines.extend("    " + location for location in sorted(develop_eggs_locations))
+        lines.extend(
+            [
+                "parallel = True",
+                "patch = subprocess",
+                "data_file = " + os.path.join(self.settings_dir, ".coverage"),
+                "",
+                "[xml]",
+                "output = " + os.path.join(self.settings_dir, COVERAGE_XML_FILE),
+                "",
+            ]
+        )
+        with io.open(rcfile, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode("\n".join(lines)))
+
+        env = {}
+        info = interpreter_info(
+            self._resolve_executable_path(python), options["cache-directory"]
+        )
+        if info is not None and tuple(info["version"][:2]) >= (3, 12):
+            env["COVERAGE_CORE"] = "sysmon"
+
+        script, args = self._test_command(distributions, options)
+        self._update_tasks_file(
+            coverage_tasks_template(python, rcfile, script, args, env)
+        )
+
+    def _prepare_profiling(self, python, options):
+        """Tasks and launch configurations running scripts under cProfile,
+        tracemalloc or py-spy (if found), outputs go to .vscode/profiles/."""
+        profile_run = self._copy_script("profile_run.py")
+        py_spy = options["py-spy-path"] or find_executable_path("py-spy")
+        profilers = [("cProfile", ["cprofile"]), ("tracemalloc", ["tracemalloc"])]
+
+        tasks = []
+        configurations = []
+        for script, args in options["profile-scripts"]:
+            program = self._bin_script(script)
+            title = " ".join([script] + args)
+            for profiler, profiler_args in profilers:
+                name = "Profile: {0} ({1})".format(title, profiler)
+                run_args = profiler_args + [program] + args
+                tasks.append(
+                    profile_task_template(name, python, [profile_run] + run_args)
+                )
+                configurations.append(
+                    profile_launch_template(name, profile_run, run_args)
+                )
+            if py_spy:
+                tasks.append(
+                    profile_task_template(
+                        "Profile: {0} (py-spy)".format(title),
+                        python,
+                        [profile_run, "--executable", py_spy, "py-spy", program]
+                        + args,
+                    )
+                )
+        tasks.append(
+            profile_task_template(
+                "Profile: summary of latest cProfile", python, [profile_run, "summary"]
+            )
+        )
+        self._update_tasks_file(tasks)
+        self._update_launch_file(configurations)
+
+    def _copy_script(self, name):
+        """Copy helper script (shipped with this recipe) into .vscode/"""
+        target = os.path.join(self.settings_dir, name)
+        shutil.copyfile(os.path.join(SCRIPTS_DIR, name), target)
+        return target
+
+    def _debug_rules(self, eggs_locations, develop_eggs_locations):
+        """debugpy rules, only develop eggs and packages are traced."""
+        included = develop_eggs_locations + self.packages
+        eggs_directory = self.buildout["buildout"]["eggs-directory"]
+        # compared canonically, rules keep the paths as spelled
+        canonical_included = set(canonical_path(p) for p in included)
+        canonical_eggs_directory = canonical_path(eggs_directory)
+        rules = [{"path": os.path.join(p, "**"), "include": True} for p in included]
+        rules.append({"path": os.path.join(eggs_directory, "**"), "include": False})
+        rules.extend(
+            {"path": os.path.join(location, "**"), "include": False}
+            for location in eggs_locations
+            if canonical_path(location) not in canonical_included
+            and not canonical_path(location).startswith(
+                canonical_eggs_directory + os.sep
+            )
+        )
+        return rules
+
+    def _libspec_step(self, python, eggs_locations, distributions):
+        """Pre-generate libspec files of Robot Framework libraries, so that
+        robotframework-lsp doesn't need to generate those on first use."""
+        return [
+            "libspec",
+            "collective.recipe.vscode.libspec:generate_libspecs",
+            {
+                "libspec_dir": os.path.join(self.settings_dir, "libspec"),
+                "python": python,
+                "pythonpath": os.pathsep.join(eggs_locations),
+                "libraries": robot_libraries(distributions),
+            },
+        ]
+
+    def _location_versions(self, eggs_locations, distributions):
+        """[location, versions, develop] of eggs locations, for the steps those
+        process eggs again only if their version changed."""
+        # keyed by canonical path, the spelled location is what steps get
+        versions = OrderedDict(
+            (canonical_path(location), []) for location in eggs_locations
+        )
+        # sources of develop eggs and packages are changing without version
+        develop = set(canonical_path(package) for package in self.packages)
+        for project_name, dist in distributions.items():
+            location = canonical_path(dist["location"])
+            if location in versions:
+                versions[location].append(
+                    "{0}=={1}".format(project_name, dist["version"])
+                )
+                if dist["develop"]:
+                    develop.add(location)
+        return [
+            [
+                location,
+                versions[canonical_path(location)],
+                canonical_path(location) in develop,
+            ]
+            for location in eggs_locations
+        ]
+
+    def _symbol_index_step(self, eggs_locations, distributions):
+        """Symbol index of eggs locations under .vscode/ (tags and symbols.json),
+        eggs are re-parsed only if their version changed."""
+        return [
+            "symbol-index",
+            "collective.recipe.vscode.symbols:build_index",
+            {
+                "index_dir": self.settings_dir,
+                "locations": self._location_versions(eggs_locations, distributions),
+            },
+        ]
+
+    def _bytecode_step(self, python, eggs_locations, distributions, pycache_prefix):
+        """Precompile eggs locations into the pycache prefix, eggs are compiled
+        again only if their version changed."""
+        return [
+            "bytecode",
+            "collective.recipe.vscode.bytecode:compile_locations",
+            {
+                "pycache_prefix": pycache_prefix,
+                "python": python,
+                "locations": self._location_versions(eggs_locations, distributions),
+            },
+        ]
+
+    def _run_steps(self, steps, options):
+        """Run editor only steps in detached background worker, or here when
+        background-steps is off (i.e. in CI)."""
+        names = ", ".join(name for name, _, _ in steps)
+        status_file = os.path.join(self.settings_dir, background.STATUS_FILE)
+        if options["background-steps"]:
+            pid = background.start(self.settings_dir, steps)
+            if pid is None:
+                self.logger.info(
+                    "{0} already running in background with the same "
+                    "inputs.".format(names)
+                )
+            else:
+                self.logger.info(
+                    "Running {0} in background (pid {1}), see {2}".format(
+                        names, pid, status_file
+                    )
+                )
+            return
+
+        status = background.run_steps(self.settings_dir, steps)
+        for name, step in status["steps"].items():
+            if step["state"] == "failed":
+                self.logger.warning(
+                    "{0} failed: {1}".format(name, step["error"].strip())
+                )
+            elif name == "libspec":
+                generated, failed = step["result"]
+                if generated:
+                    self.logger.info(
+                        "Generated libspec of {0}".format(", ".join(generated))
+                    )
+                if failed:
+                    self.logger.warning(
+                        "Could not generate libspec of {0}".format(", ".join(failed))
+                    )
+            elif name == "cache-gc":
+                removed = sum(r["removed"] for r in step["result"].values())
+                freed = sum(r["freed"] for r in step["result"].values())
+                if removed:
+                    self.logger.info(
+                        "Cache gc: removed {0} entries ({1:.1f} MB).".format(
+                            removed, freed / 1024.0 / 1024.0
+                        )
+                    )
+            elif name == "bytecode":
+                compiled, reused, failed = step["result"]
+                self.logger.info(
+                    "Bytecode: {0} location(s) compiled, {1} reused.".format(
+                        len(compiled), len(reused)
+                    )
+                )
+                if failed:
+                    self.logger.warning(
+                        "Some files could not be compiled in {0}".format(
+                            ", ".join(failed)
+                        )
+                    )
+            elif name == "zcml-index":
+                parsed, reused, problems = step["result"]
+                self.logger.info(
+                    "ZCML index: {0} file(s) parsed, {1} reused.".format(parsed, reused)
+                )
+                if problems:
+                    self.logger.warning(
+                        "ZCML: {0} problem(s), see {1}".format(
+                            problems, os.path.join(self.settings_dir, "zcml.json")
+                        )
+                    )
+            elif name == "symbol-index":
+                self.logger.info(
+                    "Symbol index: {0} location(s) parsed, {1} reused.".format(
+                        *step["result"]
+                    )
+                )
+
+    def _write_paths_file(
+        self,
+        python,
+        eggs_locations,
+        develop_eggs_locations,
+        develop_requirements,
+        distributions,
+    ):
+        """Keep resolved paths outside of settings.json, so that command line
+        tools can reuse them without resolving working set again."""
+        paths = {
+            "python": python,
+            "eggs": sorted(eggs_locations),
+            "develop": sorted(develop_eggs_locations),
+            "develop-requirements": dict(
+                (location, sorted(requirements))
+                for location, requirements in develop_requirements.items()
+            ),
+            "distributions": distributions,
+            "packages": self.packages,
+        }
+        with io.open(
+            os.path.join(self.settings_dir, PATHS_FILE), "w", encoding="utf-8"
+        ) as fp:
+            fp.write(ensure_unicode(json.dumps(paths, indent=2, sort_keys=True)))
+
+    def _update_launch_file(self, configurations, inputs=()):
+        """Merge generated configurations and inputs into .vscode/launch.json,
+        existing configurations with the same name (inputs with the same id) are
+        replaced. Inputs are file local, tasks.json has its own. Configurations
+        are tagged by their presentation group."""
+        vs_launch_file = os.path.join(self.settings_dir, "launch.json")
+        if os.path.exists(vs_launch_file):
+            with io.open(vs_launch_file, "r", encoding="utf-8") as fp:
+                launch_json = json.loads(fp.read())
+        else:
+            launch_json = dict(version="0.2.0")
+
+        configurations = [
+            dict(c, presentation=dict(c.get("presentation", {}), group=GENERATED_TAG))
+            for c in configurations
+        ]
+        names = [c["name"] for c in configurations]
+        self.generated_names.update(names)
+        launch_json["configurations"] = [
+            c
+            for c in launch_json.get("configurations", [])
+            if c.get("name") not in names
+        ] + configurations
+
+        if inputs:
+            ids = [i["id"] for i in inputs]
+            launch_json["inputs"] = [
+                i for i in launch_json.get("inputs", []) if i.get("id") not in ids
+            ] + list(inputs)
+
+        with io.open(vs_launch_file, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(launch_json, indent=4)))
+
+    def _update_tasks_file(self, tasks, inputs=()):
+        """Merge generated tasks and inputs into .vscode/tasks.json, existing
+        tasks with the same label (inputs with the same id) are replaced. Tasks
+        are tagged by their detail."""
+        vs_tasks_file = os.path.join(self.settings_dir, "tasks.json")
+        if os.path.exists(vs_tasks_file):
+            with io.open(vs_tasks_file, "r", encoding="utf-8") as fp:
+                tasks_json = json.loads(fp.read())
+        else:
+            tasks_json = dict(version="2.0.0")
+
+        tasks = [dict(t, detail=GENERATED_TAG) for t in tasks]
+        labels = [t["label"] for t in tasks]
+        self.generated_labels.update(labels)
+        tasks_json["tasks"] = [
+            t for t in tasks_json.get("tasks", []) if t.get("label") not in labels
+        ] + tasks
+
+        if inputs:
+            ids = [i["id"] for i in inputs]
+            tasks_json["inputs"] = [
+                i for i in tasks_json.get("inputs", []) if i.get("id") not in ids
+            ] + list(inputs)
+
+        with io.open(vs_tasks_file, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(tasks_json, indent=4)))
+
     def _write_project_file(self, settings, existing_settings):
         """Project File Writer:
         This method is actual doing writting project file to file system."""
@@ -539,11 +2316,39 @@ class Recipe:
                 # catching any json error
                 raise UserError(str(exc))
 
-    def _write_env_file(self, eggs_locations, path):
+    def _tools_environment(self, options):
+        """Environment variables for tools, those are configurable only by
+        environment (i.e black cache location)."""
+        environment = dict()
+        if options["performance-defaults"] and options.get("black-enabled"):
+            environment["BLACK_CACHE_DIR"] = os.path.join(
+                options["cache-directory"], "black"
+            )
+        pycache_prefix = self._pycache_prefix(options)
+        if pycache_prefix:
+            environment["PYTHONPYCACHEPREFIX"] = pycache_prefix
+        return environment
+
+    def _pycache_prefix(self, options):
+        """Shared bytecode directory, if precompilation is enabled and the
+        interpreter supports it (Python 3.8+)."""
+        if not options["bytecode-precompile"]:
+            return None
+        info = interpreter_info(
+            self._resolve_executable_path(options["python-path"]),
+            options["cache-directory"],
+        )
+        if info is None or tuple(info["version"][:2]) < (3, 8):
+            return None
+        return options["pycache-prefix"]
+
+    def _write_env_file(self, eggs_locations, path, environment=None):
         with io.open(path, "w", encoding="utf-8") as fp:
             paths = os.pathsep.join(eggs_locations)
             path_format = "PYTHONPATH={paths}:${{PYTHONPATH}}"
             fp.write(ensure_unicode(path_format.format(paths=paths)))
+            for key, value in sorted((environment or {}).items()):
+                fp.write(ensure_unicode("\n{0}={1}".format(key, value)))
 
     def _resolve_executable_path(self, path_):
         """ """
@@ -595,9 +2400,11 @@ class Recipe:
 
 
 def uninstall(name, options):
-    """Nothing much need to do with uninstall, because this recipe is doing so
-    much filesystem writting.
-    Depends overwrite option, generated project file is removed."""
+    """Generated config files, helper scripts, traces, outputs, background worker
+    files, tasks and launch configurations under .vscode/ and the generated keys of
+    pyrightconfig.json are removed. settings.json (merged with user's own
+    settings), .env and the incremental indexes (INCREMENTAL_CACHES) are kept, as
+    buildout calls this also before reinstalling the part with changed options."""
 
     logger = logging.getLogger(name)
     logger.info("uninstalling ...")
@@ -605,8 +2412,24 @@ def uninstall(name, options):
     project_root = options["project-root"]
     settings_dir = os.path.join(project_root, ".vscode")
 
-    vs_generated_file = os.path.join(settings_dir, "vs-recipe-generated-settings.json")
-    if os.path.exists(vs_generated_file):
-        os.unlink(vs_generated_file)
-        logger.info("removing {0} ...".format(vs_generated_file))
-    # xxx: nothing for now, but may be removed what ever in options?
+    filenames = list(GENERATED_FILES)
+    if os.path.isdir(settings_dir):
+        # parallel coverage data files have host and pid suffixes
+        filenames.extend(
+            filename
+            for filename in sorted(os.listdir(settings_dir))
+            if filename == ".coverage" or filename.startswith(".coverage.")
+        )
+    for filename in filenames:
+        path = os.path.join(settings_dir, filename)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.unlink(path)
+        else:
+            continue
+        logger.info("removing {0} ...".format(path))
+
+    remove_pyright_config(os.path.join(project_root, "pyrightconfig.json"))
+
+    remove_generated(settings_dir)
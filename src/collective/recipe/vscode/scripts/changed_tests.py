@@ -0,0 +1,72 @@
+# _*_ coding: utf-8 _*_
+"""Run zope.testrunner only for develop eggs with uncommitted changes
+(generated by collective.recipe.vscode):
+
+    python changed_tests.py bin/test -j 4
+
+Develop eggs are read from vs-recipe-paths.json next to this script, top level
+packages of the changed ones are given to the test runner with ``-s <package>``.
+"""
+import io
+import json
+import os
+import subprocess
+import sys
+
+
+PATHS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "vs-recipe-paths.json"
+)
+
+
+def develop_packages():
+    """(packages, location) of develop eggs."""
+    with io.open(PATHS_FILE, "r", encoding="utf-8") as fp:
+        distributions = json.loads(fp.read())["distributions"]
+    return sorted(
+        (dist.get("top-level") or [name], dist["location"])
+        for name, dist in distributions.items()
+        if dist["develop"]
+    )
+
+
+def changed_packages(packages):
+    """Packages with uncommitted changes, git is asked for all of them at once."""
+    processes = []
+    for names, location in packages:
+        try:
+            process = subprocess.Popen(
+                ["git", "status", "--porcelain", "--", "."],
+                cwd=location,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except OSError:
+            continue
+        processes.append((names, process))
+
+    changed = []
+    for names, process in processes:
+        output, _ = process.communicate()
+        if process.returncode == 0 and output.strip():
+            changed.extend(names)
+    return changed
+
+
+def main(args):
+    if not args:
+        print("Usage: changed_tests.py <test script> [test runner arguments]")
+        return 2
+    changed = changed_packages(develop_packages())
+    if not changed:
+        print("No develop eggs with uncommitted changes.")
+        return 0
+    print("Testing changed develop eggs: {0}".format(", ".join(changed)))
+    command = list(args)
+    for name in changed:
+        command.extend(["-s", name])
+    return subprocess.call(command)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
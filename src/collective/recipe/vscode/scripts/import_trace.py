@@ -0,0 +1,109 @@
+# _*_ coding: utf-8 _*_
+"""Run a buildout script (i.e. bin/test or bin/instance fg) and record which
+sys.path locations modules were actually imported from, including dynamic
+imports of ZCML and Products initialization (generated by
+collective.recipe.vscode):
+
+    python import_trace.py bin/test -t foo
+
+Trace is written into import-trace.json next to this script, when the script
+exits (or is stopped with Ctrl+C).
+"""
+import io
+import json
+import os
+import runpy
+import sys
+import time
+
+
+TRACE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "import-trace.json"
+)
+
+
+def canonical_path(path):
+    """Real, case normalized path without trailing separator."""
+    path = os.path.normcase(os.path.realpath(path))
+    return path.rstrip(os.sep) or os.sep
+
+
+def module_paths(module):
+    """Files (or namespace package directories) of the module."""
+    paths = []
+    if getattr(module, "__file__", None):
+        paths.append(module.__file__)
+    elif getattr(module, "__path__", None):
+        try:
+            paths.extend(module.__path__)
+        except TypeError:
+            pass
+    return paths
+
+
+def path_entries():
+    """Existing sys.path locations."""
+    return sorted(set(canonical_path(p) for p in sys.path if p and os.path.exists(p)))
+
+
+def imported_locations():
+    """sys.path locations of all imported modules."""
+    entries = sorted(path_entries(), key=len, reverse=True)
+    locations = set()
+    seen = set()
+    for module in list(sys.modules.values()):
+        for path in module_paths(module):
+            directory = os.path.dirname(path)
+            if directory in seen:
+                continue
+            seen.add(directory)
+            path = canonical_path(path)
+            for entry in entries:
+                if path.startswith(entry + os.sep):
+                    locations.add(entry)
+                    break
+    return sorted(locations)
+
+
+def write_trace(command, started):
+    """ """
+    trace = {
+        "command": command,
+        "seconds": round(time.time() - started, 2),
+        "modules": len(sys.modules),
+        "locations": imported_locations(),
+        # locations, those were available when traced
+        "path": path_entries(),
+    }
+    with io.open(TRACE_FILE, "wb") as fp:
+        fp.write(json.dumps(trace, indent=2, sort_keys=True).encode("utf-8"))
+    sys.stderr.write(
+        "Import trace: {0} location(s) used, written into {1}\n".format(
+            len(trace["locations"]), TRACE_FILE
+        )
+    )
+
+
+def main(args):
+    if not args:
+        print("Usage: import_trace.py <script> [script arguments]")
+        return 2
+    program = args[0]
+    sys.argv = list(args)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(program)))
+    started = time.time()
+    returncode = 0
+    try:
+        runpy.run_path(program, run_name="__main__")
+    except SystemExit as exc:
+        returncode = exc.code if isinstance(exc.code, int) else int(bool(exc.code))
+    except KeyboardInterrupt:
+        # instance is stopped with Ctrl+C, trace is still written
+        pass
+    finally:
+        write_trace(list(args), started)
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,59 @@
+# _*_ coding: utf-8 _*_
+"""pabot worker command (generated by collective.recipe.vscode), which gives each
+pabot process its own Zope server and Robot listener ports:
+
+    pabot --processes N --command python pabot_worker.py --end-command tests/
+
+Ports are PABOT_ZOPE_PORT and PABOT_LISTENER_PORT plus PABOTEXECUTIONPOOLID.
+"""
+import io
+import os
+import subprocess
+import sys
+
+
+POOL_ID_VARIABLE = "PABOTEXECUTIONPOOLID:"
+
+
+def pool_id(args):
+    """PABOTEXECUTIONPOOLID from command line arguments or argument files."""
+    for index, arg in enumerate(args):
+        value = args[index + 1] if index + 1 < len(args) else ""
+        if arg.startswith("--variable="):
+            value = arg.split("=", 1)[1]
+        elif arg in ("--argumentfile", "-A") and os.path.isfile(value):
+            with io.open(value, "r", encoding="utf-8") as fp:
+                found = pool_id(fp.read().split())
+            if found is not None:
+                return found
+            continue
+        elif arg not in ("--variable", "-v"):
+            continue
+        if value.startswith(POOL_ID_VARIABLE):
+            return int(value[len(POOL_ID_VARIABLE):])
+    return None
+
+
+def main(args):
+    index = pool_id(args) or 0
+    zope_port = int(os.environ.get("PABOT_ZOPE_PORT", "56001")) + index
+    listener_port = int(os.environ.get("PABOT_LISTENER_PORT", "50001")) + index
+
+    env = dict(os.environ)
+    env["LISTENER_PORT"] = str(listener_port)
+    command = [
+        sys.executable,
+        "-m",
+        "robot",
+        "--variable",
+        "ZOPE_HOST:localhost",
+        "--variable",
+        "ZOPE_port:{0}".format(zope_port),
+        "--listener",
+        "plone.app.robotframework.server.RobotListener",
+    ] + args
+    return subprocess.call(command, env=env)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
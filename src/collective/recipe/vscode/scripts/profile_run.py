@@ -0,0 +1,168 @@
+# _*_ coding: utf-8 _*_
+"""Run buildout scripts (i.e. bin/instance fg) under a profiler (generated by
+collective.recipe.vscode):
+
+    python profile_run.py cprofile bin/instance fg
+    python profile_run.py tracemalloc bin/test -t foo
+    python profile_run.py --executable /usr/bin/py-spy py-spy bin/instance fg
+    python profile_run.py summary
+
+Outputs are written into a timestamped directory under profiles/ next to this
+script, summary writes sorted text summary of the latest cProfile output.
+"""
+import argparse
+import io
+import os
+import pstats
+import runpy
+import subprocess
+import sys
+import time
+
+
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+CPROFILE_FILE = "cprofile.prof"
+TRACEMALLOC_FILE = "tracemalloc.txt"
+PY_SPY_FILE = "py-spy.svg"
+SUMMARY_FILE = "summary.txt"
+
+
+def output_directory():
+    """New timestamped directory for the profiler outputs."""
+    path = os.path.join(PROFILES_DIR, time.strftime("%Y%m%d-%H%M%S"))
+    suffix = 1
+    candidate = path
+    while os.path.exists(candidate):
+        candidate = "{0}-{1}".format(path, suffix)
+        suffix += 1
+    os.makedirs(candidate)
+    return candidate
+
+
+def run_program(program, args):
+    """Run the script in this process, like python would do."""
+    sys.argv = [program] + list(args)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(program)))
+    try:
+        runpy.run_path(program, run_name="__main__")
+    except SystemExit as exc:
+        return exc.code if isinstance(exc.code, int) else int(bool(exc.code))
+    except KeyboardInterrupt:
+        # instance is stopped with Ctrl+C, profile is still written
+        pass
+    return 0
+
+
+def run_cprofile(directory, program, args):
+    """ """
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        returncode = run_program(program, args)
+    finally:
+        profile.disable()
+        profile.dump_stats(os.path.join(directory, CPROFILE_FILE))
+    return returncode
+
+
+def run_tracemalloc(directory, program, args, limit=50):
+    """ """
+    import tracemalloc
+
+    tracemalloc.start(25)
+    try:
+        returncode = run_program(program, args)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        snapshot.dump(os.path.join(directory, "tracemalloc.snapshot"))
+        lines = [
+            "{0}: {1}".format(index, stat)
+            for index, stat in enumerate(
+                snapshot.statistics("lineno")[:limit], start=1
+            )
+        ]
+        with io.open(
+            os.path.join(directory, TRACEMALLOC_FILE), "w", encoding="utf-8"
+        ) as fp:
+            fp.write(u"\n".join(lines + [u""]))
+    return returncode
+
+
+def run_py_spy(directory, program, args, executable="py-spy"):
+    """Sampling profile of the script (and its subprocesses) as flame graph."""
+    command = [
+        executable,
+        "record",
+        "--subprocesses",
+        "-o",
+        os.path.join(directory, PY_SPY_FILE),
+        "--",
+        sys.executable,
+        program,
+    ] + list(args)
+    try:
+        return subprocess.call(command)
+    except KeyboardInterrupt:
+        return 0
+
+
+def latest_profile():
+    """ """
+    candidates = []
+    if os.path.isdir(PROFILES_DIR):
+        for name in os.listdir(PROFILES_DIR):
+            path = os.path.join(PROFILES_DIR, name, CPROFILE_FILE)
+            if os.path.exists(path):
+                candidates.append((os.path.getmtime(path), path))
+    return max(candidates)[1] if candidates else None
+
+
+def write_summary(path, sort="cumulative", limit=50):
+    """Sorted text summary next to the cProfile output."""
+    summary_file = os.path.join(os.path.dirname(path), SUMMARY_FILE)
+    with io.open(summary_file, "w", encoding="utf-8") as fp:
+        stats = pstats.Stats(path, stream=fp)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return summary_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile buildout scripts.")
+    parser.add_argument(
+        "profiler", choices=["cprofile", "tracemalloc", "py-spy", "summary"]
+    )
+    parser.add_argument("--executable", default="py-spy", help="py-spy executable")
+    parser.add_argument("--sort", default="cumulative", help="summary sort order")
+    # options are given before the profiler, everything after it belongs to the
+    # program (and its own options)
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="program [args]")
+    args = parser.parse_args(argv)
+    program = args.command[0] if args.command else None
+    program_args = args.command[1:]
+
+    if args.profiler == "summary":
+        path = program or latest_profile()
+        if not path:
+            print("No cProfile output found in {0}".format(PROFILES_DIR))
+            return 1
+        summary_file = write_summary(path, args.sort)
+        with io.open(summary_file, "r", encoding="utf-8") as fp:
+            print(fp.read())
+        return 0
+
+    if not program:
+        parser.error("program is required")
+    directory = output_directory()
+    print("Writing {0} output into {1}".format(args.profiler, directory))
+    if args.profiler == "cprofile":
+        return run_cprofile(directory, program, program_args)
+    if args.profiler == "tracemalloc":
+        return run_tracemalloc(directory, program, program_args)
+    return run_py_spy(directory, program, program_args, args.executable)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
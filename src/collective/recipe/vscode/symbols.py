@@ -0,0 +1,188 @@
+# _*_ coding: utf-8 _*_
+"""Symbol index (modules, classes, interfaces, functions) of eggs locations,
+in ctags compatible and JSON formats."""
+import ast
+import io
+import json
+import multiprocessing
+import os
+import re
+
+
+INDEX_VERSION = 1
+SYMBOLS_FILE = "symbols.json"
+TAGS_FILE = "tags"
+IGNORED_DIRECTORIES = ("__pycache__", "node_modules", "EGG-INFO")
+
+FUNCTION_TYPES = tuple(
+    getattr(ast, name)
+    for name in ("FunctionDef", "AsyncFunctionDef")
+    if hasattr(ast, name)
+)
+
+interface_name = re.compile(r"^I[A-Z]")
+
+
+def module_name(location, path):
+    """Dotted module name of python file inside location."""
+    relpath = os.path.splitext(os.path.relpath(path, location))[0]
+    parts = relpath.split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _base_name(node):
+    """ """
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def _is_interface(node):
+    """zope.interface convention, class IFoo(Interface) or class IFoo(IBar)"""
+    for base in node.bases:
+        name = _base_name(base)
+        if name == "Interface" or interface_name.match(name):
+            return True
+    return False
+
+
+def _source_symbols(tree, relpath, module):
+    """ """
+    symbols = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            kind = "interface" if _is_interface(node) else "class"
+            symbols.append([node.name, kind, relpath, node.lineno, module])
+            for child in node.body:
+                if isinstance(child, FUNCTION_TYPES):
+                    symbols.append(
+                        [
+                            child.name,
+                            "member",
+                            relpath,
+                            child.lineno,
+                            "{0}.{1}".format(module, node.name),
+                        ]
+                    )
+        elif isinstance(node, FUNCTION_TYPES):
+            symbols.append([node.name, "function", relpath, node.lineno, module])
+    return symbols
+
+
+def index_location(location):
+    """Parse all python files of the location, this is executed in process pool.
+    Symbols are [name, kind, path relative to location, line, module]."""
+    symbols = []
+    for dirpath, dirnames, filenames in os.walk(location):
+        dirnames[:] = sorted(
+            d
+            for d in dirnames
+            if not d.startswith(".")
+            and not d.endswith(".egg-info")
+            and d not in IGNORED_DIRECTORIES
+        )
+        for filename in sorted(filenames):
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(path, location)
+            module = module_name(location, path)
+            symbols.append([module, "module", relpath, 1, module])
+            try:
+                with io.open(path, "rb") as fp:
+                    tree = ast.parse(fp.read(), path)
+            except (SyntaxError, ValueError, TypeError, IOError):
+                # i.e python 2 only code or broken files
+                continue
+            symbols.extend(_source_symbols(tree, relpath, module))
+    return location, symbols
+
+
+def newest_mtime(location):
+    """Newest modification time of python files inside location."""
+    newest = 0
+    for dirpath, dirnames, filenames in os.walk(location):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRECTORIES]
+        for filename in filenames:
+            if filename.endswith(".py"):
+                path = os.path.join(dirpath, filename)
+                newest = max(newest, os.path.getmtime(path))
+    return newest
+
+
+def location_key(location, versions, develop):
+    """Egg is re-parsed only when version (or for develop eggs, sources) changed."""
+    key = ",".join(sorted(versions))
+    if develop:
+        key = "{0}@{1}".format(key, newest_mtime(location))
+    return key
+
+
+def load_index(index_dir):
+    """ """
+    try:
+        with io.open(os.path.join(index_dir, SYMBOLS_FILE), "rb") as fp:
+            index = json.loads(fp.read().decode("utf-8"))
+    except (IOError, ValueError):
+        return {}
+    if index.get("version") != INDEX_VERSION:
+        return {}
+    return index["locations"]
+
+
+def write_tags(path, locations):
+    """Sorted ctags file with extended fields (kind and module)."""
+    lines = []
+    for location, entry in locations.items():
+        for name, kind, relpath, line, module in entry["symbols"]:
+            lines.append(
+                u'{0}\t{1}\t{2};"\tkind:{3}\tmodule:{4}'.format(
+                    name, os.path.join(location, relpath), line, kind, module
+                )
+            )
+    lines.sort()
+    header = [
+        u"!_TAG_FILE_FORMAT\t2\t/extended format/",
+        u"!_TAG_FILE_SORTED\t1\t/0=unsorted, 1=sorted, 2=foldcase/",
+        u"!_TAG_PROGRAM_NAME\tcollective.recipe.vscode\t//",
+    ]
+    with io.open(path, "wb") as fp:
+        fp.write(u"\n".join(header + lines + [u""]).encode("utf-8"))
+
+
+def build_index(index_dir, locations, processes=None):
+    """Build symbol index of locations ([location, versions, develop] items)
+    into index_dir. Only locations with changed key are parsed (in parallel),
+    returns numbers of parsed and reused locations."""
+    existing = load_index(index_dir)
+    index = {}
+    stale = []
+    for location, versions, develop in locations:
+        if not os.path.isdir(location):
+            continue
+        key = location_key(location, versions, develop)
+        if location in existing and existing[location]["key"] == key:
+            index[location] = existing[location]
+        else:
+            index[location] = {"key": key, "symbols": []}
+            stale.append(location)
+
+    if stale:
+        pool = multiprocessing.Pool(processes or multiprocessing.cpu_count())
+        try:
+            for location, symbols in pool.imap_unordered(index_location, stale):
+                index[location]["symbols"] = symbols
+        finally:
+            pool.close()
+            pool.join()
+
+    with io.open(os.path.join(index_dir, SYMBOLS_FILE), "wb") as fp:
+        data = {"version": INDEX_VERSION, "locations": index}
+        fp.write(json.dumps(data, sort_keys=True).encode("utf-8"))
+    write_tags(os.path.join(index_dir, TAGS_FILE), index)
+
+    return len(stale), len(index) - len(stale)
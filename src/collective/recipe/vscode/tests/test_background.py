@@ -0,0 +1,122 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import write
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+
+STEPS = [["dumps", "json:dumps", {"obj": [1, 2]}]]
+
+
+class TestBackground(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+
+    def read_status(self):
+        from ..background import STATUS_FILE
+
+        with open(os.path.join(self.location, STATUS_FILE)) as fp:
+            return json.loads(fp.read())
+
+    def wait_done(self):
+        """Status of the finished worker, after it has released the lock."""
+        from ..background import LOCK_FILE
+
+        deadline = time.time() + 60
+        status = {}
+        while time.time() < deadline:
+            try:
+                status = self.read_status()
+            except (IOError, ValueError):
+                pass
+            if status.get("state") == "done":
+                break
+            time.sleep(0.1)
+
+        deadline = time.time() + 10
+        while os.path.exists(os.path.join(self.location, LOCK_FILE)):
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.1)
+        return status
+
+    def test_run_steps(self):
+        """ """
+        from ..background import run_steps
+
+        steps = STEPS + [["missing", "json:missing", {}]]
+        status = run_steps(self.location, steps)
+        self.assertEqual("failed", status["state"])
+        self.assertEqual("[1, 2]", status["steps"]["dumps"]["result"])
+        self.assertEqual("failed", status["steps"]["missing"]["state"])
+        self.assertIn("AttributeError", status["steps"]["missing"]["error"])
+        self.assertEqual(status, self.read_status())
+
+    def test_start(self):
+        """ """
+        from ..background import start
+
+        pid = start(self.location, STEPS)
+        self.assertTrue(pid)
+
+        # lock is released, when done
+        status = self.wait_done()
+        self.assertEqual("done", status.get("state"))
+        self.assertEqual(pid, status["pid"])
+        self.assertEqual("[1, 2]", status["steps"]["dumps"]["result"])
+
+    def test_start_same_inputs_running(self):
+        """ """
+        from ..background import LOCK_FILE
+        from ..background import inputs_hash
+        from ..background import start
+
+        lock = {"pid": os.getpid(), "hash": inputs_hash(STEPS), "started": time.time()}
+        write(self.location, LOCK_FILE, json.dumps(lock))
+        self.assertIsNone(start(self.location, STEPS))
+
+    def test_start_same_inputs_spawned(self):
+        """ """
+        from ..background import JOB_FILE
+        from ..background import LOG_FILE
+        from ..background import inputs_hash
+        from ..background import start
+
+        write(self.location, LOG_FILE, "previous run")
+        # worker which has not taken the lock yet
+        job = {"hash": inputs_hash(STEPS), "pid": os.getpid(), "started": time.time()}
+        write(self.location, JOB_FILE, json.dumps(job))
+        self.assertIsNone(start(self.location, STEPS))
+
+        # finished worker, the same inputs run again with a new log
+        job["started"] = 0
+        write(self.location, JOB_FILE, json.dumps(job))
+        pid = start(self.location, STEPS)
+        self.assertTrue(pid)
+        with open(os.path.join(self.location, JOB_FILE)) as fp:
+            self.assertEqual(pid, json.loads(fp.read())["pid"])
+        self.assertIsNone(start(self.location, STEPS))
+        with open(os.path.join(self.location, LOG_FILE + ".1")) as fp:
+            self.assertEqual("previous run", fp.read())
+        self.assertEqual(pid, self.wait_done()["pid"])
+
+    def test_acquire_stale_lock(self):
+        """ """
+        from ..background import LOCK_FILE
+        from ..background import acquire_lock
+
+        self.assertTrue(acquire_lock(self.location, "first"))
+        # this process is alive
+        self.assertFalse(acquire_lock(self.location, "second"))
+
+        lock = {"pid": os.getpid(), "hash": "first", "started": 0}
+        write(self.location, LOCK_FILE, json.dumps(lock))
+        self.assertTrue(acquire_lock(self.location, "second"))
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
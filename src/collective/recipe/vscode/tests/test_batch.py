@@ -0,0 +1,104 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import mkdir
+from zc.buildout.testing import read
+from zc.buildout.testing import write
+
+import json
+import os
+import tempfile
+import unittest
+
+
+BUILDOUT_CFG = """[buildout]
+parts = vscode
+
+[vscode]
+recipe = collective.recipe.vscode
+"""
+
+# project's own settings win over the batch defaults
+PROJECT_CFG = """[buildout]
+parts = vscode
+offline = true
+
+[vscode]
+recipe = collective.recipe.vscode
+eggs = zc.buildout
+offline-resolution = false
+background-steps = false
+symbol-index = true
+"""
+
+
+class TestBatch(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+        for path in (("a",), ("b",), ("b", "nested"), ("c",), ("a", "eggs")):
+            mkdir(self.location, *path)
+        write(self.location, "a", "buildout.cfg", BUILDOUT_CFG)
+        write(self.location, "b", "buildout.cfg", BUILDOUT_CFG)
+        # inside other project
+        write(self.location, "b", "nested", "buildout.cfg", BUILDOUT_CFG)
+        # not using the recipe
+        write(self.location, "c", "buildout.cfg", "[buildout]\nparts =\n")
+
+    def test_discover(self):
+        """ """
+        from ..batch import discover
+
+        self.assertEqual(
+            [os.path.join(self.location, "a"), os.path.join(self.location, "b")],
+            discover(self.location),
+        )
+
+    def test_main(self):
+        """ """
+        from ..background import STATUS_FILE
+        from ..batch import main
+
+        project = os.path.join(self.location, "d")
+        mkdir(project)
+        write(project, "buildout.cfg", PROJECT_CFG)
+        json_file = os.path.join(self.location, "batch.json")
+        self.assertEqual(0, main([project, "--processes", "2", "--json", json_file]))
+
+        with open(json_file) as fp:
+            results = json.loads(fp.read())
+        self.assertEqual([project], [r["project"] for r in results])
+        self.assertEqual(["vscode"], results[0]["parts"])
+        settings = json.loads(read(project, ".vscode", "settings.json"))
+        self.assertTrue(
+            [p for p in settings["python.analysis.extraPaths"] if "zc.buildout" in p]
+        )
+        # steps run in the pool worker, not in background
+        status = json.loads(read(project, ".vscode", STATUS_FILE))
+        self.assertEqual("done", status["state"])
+        self.assertEqual(["symbol-index"], list(status["steps"]))
+
+    def test_generate_error(self):
+        """ """
+        from ..batch import format_report
+        from ..batch import generate
+
+        cwd = os.getcwd()
+        project = os.path.join(self.location, "c")
+        result = generate((project, "missing.cfg", True))
+        self.assertEqual(cwd, os.getcwd())
+        self.assertEqual([], result["parts"])
+        self.assertIn("missing.cfg", result["error"])
+
+        report = format_report(
+            [{"project": "/a", "parts": ["vscode"], "error": None, "seconds": 1.5}]
+            + [result]
+        )
+        lines = report.splitlines()
+        self.assertEqual(["/a", "1", "1.50", "ok"], lines[1].split())
+        self.assertEqual(["total", "1"], lines[3].split()[:2])
+        self.assertEqual("1 failed", lines[3].split(None, 3)[-1])
+        self.assertIn(project, lines)
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
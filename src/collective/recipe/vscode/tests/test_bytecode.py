@@ -0,0 +1,74 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import mkdir
+from zc.buildout.testing import write
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+
+class TestBytecode(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+        self.prefix = os.path.join(self.location, "pycache")
+        self.egg = os.path.join(self.location, "foo-1.0.egg")
+        self.develop = os.path.join(self.location, "src", "bar")
+        mkdir(self.egg)
+        mkdir(self.location, "src")
+        mkdir(self.develop)
+        write(self.egg, "foo.py", "FOO = 1\n")
+        write(self.develop, "bar.py", "BAR = 1\n")
+
+    def compiled(self):
+        """Source files of this test with bytecode in pycache prefix, the prefix
+        mirrors absolute source directories."""
+        found = []
+        mirror = self.prefix + os.path.realpath(self.location)
+        for dirpath, _, filenames in os.walk(mirror):
+            found.extend(f.split(".")[0] for f in filenames if f.endswith(".pyc"))
+        return sorted(found)
+
+    @unittest.skipIf(sys.version_info < (3, 8), "pycache_prefix is Python 3.8+")
+    def test_compile_locations(self):
+        """ """
+        from ..bytecode import compile_locations
+        from ..bytecode import MANIFEST_FILE
+
+        locations = [
+            [self.egg, ["foo==1.0"], False],
+            [self.develop, [], True],
+            [os.path.join(self.location, "missing"), [], False],
+        ]
+        compiled, reused, failed = compile_locations(
+            self.prefix, sys.executable, locations, processes=2
+        )
+        self.assertEqual(sorted([self.egg, self.develop]), compiled)
+        self.assertEqual(([], []), (reused, failed))
+        self.assertEqual(["bar", "foo"], self.compiled())
+        # no __pycache__ next to sources
+        self.assertEqual(["foo.py"], os.listdir(self.egg))
+
+        with open(os.path.join(self.prefix, MANIFEST_FILE)) as fp:
+            manifest = json.loads(fp.read())
+        self.assertEqual(["foo==1.0"], manifest[sys.executable][self.egg])
+
+        # unchanged egg is skipped, develop egg is visited always
+        compiled, reused, failed = compile_locations(
+            self.prefix, sys.executable, locations, processes=2
+        )
+        self.assertEqual(([self.develop], [self.egg], []), (compiled, reused, failed))
+
+        write(self.develop, "broken.py", "def broken(:\n")
+        locations[0][1] = ["foo==1.1"]
+        compiled, reused, failed = compile_locations(
+            self.prefix, sys.executable, locations, processes=2
+        )
+        self.assertEqual(([self.egg], [], [self.develop]), (compiled, reused, failed))
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
@@ -0,0 +1,103 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import mkdir
+from zc.buildout.testing import write
+
+import os
+import tempfile
+import time
+import unittest
+
+
+class TestCache(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+        self.cache = os.path.join(self.location, "libspec")
+        mkdir(self.cache)
+        now = time.time()
+        # name, size, days since last use
+        for name, size, days in (("old", 10, 200), ("a", 30, 3), ("b", 20, 1)):
+            path = os.path.join(self.cache, name + ".libspec")
+            write(path, "x" * size)
+            used = now - days * 24 * 60 * 60
+            os.utime(path, (used, used))
+        write(self.cache, "manifest.json", "{}")
+
+    def test_collect(self):
+        """ """
+        from ..cache import DAY
+        from ..cache import collect
+
+        result = collect(self.cache, 100, 180 * DAY, dry_run=True)
+        self.assertEqual(
+            {"entries": 3, "size": 60, "removed": 1, "freed": 10}, result
+        )
+        self.assertEqual(4, len(os.listdir(self.cache)))
+
+        # expired one and least recently used until within size budget
+        result = collect(self.cache, 25, 180 * DAY)
+        self.assertEqual(2, result["removed"])
+        self.assertEqual(
+            ["b.libspec", "manifest.json"], sorted(os.listdir(self.cache))
+        )
+
+    def test_collect_directories(self):
+        """ """
+        from ..cache import collect_caches
+        from ..cache import format_report
+        from ..cache import parse_budgets
+
+        profile = os.path.join(self.location, "profiles", "20200101-000000")
+        mkdir(self.location, "profiles")
+        mkdir(profile)
+        write(profile, "cprofile.prof", "x" * 10)
+
+        budgets = parse_budgets("profiles 0 30\nlibspec 1 1000")
+        results = collect_caches(
+            self.location, os.path.join(self.location, "missing"), budgets
+        )
+        self.assertEqual(
+            ["profiles", "libspec", "mypy", "black", "pycache"], list(results)
+        )
+        self.assertEqual(1, results["profiles"]["removed"])
+        self.assertFalse(os.path.exists(profile))
+        self.assertEqual(0, results["libspec"]["removed"])
+        self.assertEqual(0, results["mypy"]["entries"])
+        self.assertIn("profiles", format_report(results))
+
+        with self.assertRaises(ValueError):
+            parse_budgets("profiles 1")
+
+    def test_collect_pycache(self):
+        """Files of each directory of the pycache prefix are an entry"""
+        from ..cache import collect_caches
+        from ..cache import parse_budgets
+
+        prefix = os.path.join(self.location, "prefix")
+        old = os.path.join(prefix, "eggs", "old.egg")
+        new = os.path.join(prefix, "eggs", "new.egg")
+        mkdir(prefix)
+        mkdir(prefix, "eggs")
+        for directory, days in ((old, 100), (new, 1)):
+            mkdir(directory)
+            path = os.path.join(directory, "foo.cpython-311.pyc")
+            write(path, "x")
+            used = time.time() - days * 24 * 60 * 60
+            os.utime(path, (used, used))
+        write(prefix, "manifest.json", "{}")
+
+        results = collect_caches(
+            self.location,
+            self.location,
+            parse_budgets("pycache 100 60"),
+            pycache_prefix=prefix,
+        )
+        self.assertEqual(1, results["pycache"]["removed"])
+        self.assertEqual([], os.listdir(old))
+        self.assertEqual(["foo.cpython-311.pyc"], os.listdir(new))
+        self.assertTrue(os.path.exists(os.path.join(prefix, "manifest.json")))
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
@@ -0,0 +1,102 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import mkdir
+from zc.buildout.testing import write
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+
+class TestImporttime(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+        self.develop = os.path.join(self.location, "src", "my.pkg")
+        self.egg = os.path.join(self.location, "eggs", "other-1.0.egg")
+        for path in (("src",), ("src", "my.pkg"), ("eggs",), ("eggs", "other-1.0.egg")):
+            mkdir(self.location, *path)
+        mkdir(self.develop, "my")
+        mkdir(self.develop, "my", "pkg")
+        write(self.develop, "my", "__init__.py", "")
+        write(self.develop, "my", "pkg", "__init__.py", "import other\n")
+        write(self.egg, "other.py", "import json\n")
+        mkdir(self.location, "broken")
+        write(self.location, "broken", "broken.py", "raise ValueError('boom')\n")
+
+        mkdir(self.location, ".vscode")
+        paths = {
+            "python": sys.executable,
+            "eggs": [self.develop, self.egg, os.path.join(self.location, "broken")],
+            "develop": [self.develop],
+            "develop-requirements": {},
+            "distributions": {
+                "my.pkg": {"location": self.develop, "develop": True, "top-level": []},
+                "other": {
+                    "location": self.egg,
+                    "develop": False,
+                    "top-level": ["other"],
+                },
+            },
+            "packages": [],
+        }
+        write(self.location, ".vscode", "vs-recipe-paths.json", json.dumps(paths))
+
+    def test_owner_of(self):
+        """ """
+        from ..importtime import OTHER
+        from ..importtime import module_owners
+        from ..importtime import owner_of
+
+        owners = module_owners(
+            {
+                "plone.app.foo": {"top-level": ["plone"]},
+                "plone.base": {"top-level": ["plone"]},
+            }
+        )
+        self.assertEqual("plone.app.foo", owner_of("plone.app.foo.browser", owners))
+        self.assertEqual("plone.base", owner_of("plone.base", owners))
+        self.assertEqual(OTHER, owner_of("json.decoder", owners))
+
+    def test_main(self):
+        """ """
+        from ..importtime import main
+
+        json_file = os.path.join(self.location, "importtime.json")
+        self.assertEqual(
+            0,
+            main(
+                [
+                    "--project-root",
+                    self.location,
+                    "--repeat",
+                    "3",
+                    "--processes",
+                    "2",
+                    "--json",
+                    json_file,
+                ]
+            ),
+        )
+        with open(json_file) as fp:
+            results = json.loads(fp.read())
+        self.assertEqual(["my.pkg"], list(results))
+        self.assertEqual(3, results["my.pkg"]["runs"])
+        self.assertIn("other", results["my.pkg"]["distributions"])
+        self.assertIn("my.pkg", results["my.pkg"]["distributions"])
+        self.assertGreater(results["my.pkg"]["total_us"], 0)
+
+        self.assertEqual(
+            1, main(["--project-root", self.location, "--module", "broken"])
+        )
+
+        # paths file is not written yet
+        with self.assertRaises(SystemExit) as context:
+            main(["--project-root", os.path.join(self.location, "missing")])
+        self.assertEqual(2, context.exception.code)
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
@@ -0,0 +1,105 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import write
+
+import json
+import os
+import stat
+import tempfile
+import unittest
+
+
+# python -m robot.libdoc <library> <output>
+FAKE_PYTHON = """#!/bin/sh
+if [ "$3" = "BrokenLibrary" ]; then
+    echo "Importing library 'BrokenLibrary' failed"
+    exit 252
+fi
+echo "$3 $PYTHONPATH" > "$4"
+"""
+
+
+class TestLibspec(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+        self.libspec_dir = os.path.join(self.location, "libspec")
+        self.python = os.path.join(self.location, "python")
+        write(self.python, FAKE_PYTHON)
+        os.chmod(self.python, os.stat(self.python).st_mode | stat.S_IEXEC)
+
+    def test_robot_libraries(self):
+        """ """
+        from ..libspec import robot_libraries
+
+        egg = os.path.join(self.location, "plone.app.robotframework-2.0.0.egg")
+        package = os.path.join(egg, "plone", "app", "robotframework")
+        os.makedirs(os.path.join(package, "tests"))
+        write(egg, "plone", "__init__.py", "")
+        write(egg, "plone", "app", "__init__.py", "")
+        write(package, "__init__.py", "")
+        write(package, "utils.py", "def get_site(): pass")
+        write(package, "keywords.py", "class Zope:\n    ROBOT_LIBRARY_SCOPE = 'GLOBAL'")
+        write(package, "autologin.py", "from robot.api.deco import keyword")
+        write(package, "tests", "__init__.py", "")
+        write(package, "tests", "test_keywords.py", "import robot.api")
+
+        distributions = {
+            "robotframework-seleniumlibrary": {
+                "version": "5.1.3",
+                "requires": ["robotframework", "selenium"],
+                "top-level": ["SeleniumLibrary"],
+            },
+            "plone.app.robotframework": {
+                "version": "2.0.0",
+                "requires": ["robotframework", "setuptools"],
+                "top-level": ["plone"],
+                "location": egg,
+            },
+            "zc.buildout": {"version": "2.13.1", "requires": ["setuptools"]},
+        }
+        self.assertEqual(
+            {
+                "SeleniumLibrary": "robotframework-seleniumlibrary==5.1.3",
+                # library modules, not the namespace package
+                "plone.app.robotframework.autologin": "plone.app.robotframework==2.0.0",
+                "plone.app.robotframework.keywords": "plone.app.robotframework==2.0.0",
+            },
+            robot_libraries(distributions),
+        )
+
+    def test_generate_libspecs(self):
+        """ """
+        from ..libspec import generate_libspecs
+
+        libraries = {"SeleniumLibrary": "5.1.3", "BrokenLibrary": "1.0"}
+        generated, failed = generate_libspecs(
+            self.libspec_dir, self.python, "/tmp/eggs/egg1.egg", libraries, 2
+        )
+        self.assertEqual(["SeleniumLibrary"], generated)
+        self.assertEqual(["BrokenLibrary"], failed)
+        with open(os.path.join(self.libspec_dir, "SeleniumLibrary.libspec")) as fp:
+            self.assertEqual("SeleniumLibrary /tmp/eggs/egg1.egg", fp.read().strip())
+        with open(os.path.join(self.libspec_dir, "manifest.json")) as fp:
+            self.assertEqual({"SeleniumLibrary": "5.1.3"}, json.load(fp))
+
+        # only changed versions are generated again
+        generated, failed = generate_libspecs(
+            self.libspec_dir, self.python, "/tmp/eggs/egg1.egg", libraries, 2
+        )
+        self.assertEqual([], generated)
+        self.assertEqual(["BrokenLibrary"], failed)
+
+        libraries = {"SeleniumLibrary": "6.0.0"}
+        generated, failed = generate_libspecs(
+            self.libspec_dir, self.python, "/tmp/eggs/egg1.egg", libraries, 2
+        )
+        self.assertEqual(["SeleniumLibrary"], generated)
+
+        # removed libraries are forgotten
+        generate_libspecs(self.libspec_dir, self.python, "", {}, 2)
+        self.assertEqual(["manifest.json"], os.listdir(self.libspec_dir))
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
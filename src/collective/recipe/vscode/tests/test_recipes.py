@@ -7,7 +7,11 @@ from zc.buildout.testing import read
 from zc.buildout.testing import write
 
 import json
+import multiprocessing
 import os
+import runpy
+import subprocess
+import sys
 import tempfile
 import unittest
 import zc.recipe.egg
@@ -34,9 +38,12 @@ class TestRecipe(unittest.TestCase):
         # Set eggs
         self.buildout["buildout"]["directory"] = self.location
 
-        self.recipe_options = dict(
-            recipe="collective.recipe.vscode", eggs="zc.recipe.egg\nzc.buildout"
-        )
+        self.recipe_options = {
+            "recipe": "collective.recipe.vscode",
+            "eggs": "zc.recipe.egg\nzc.buildout",
+            # probed interpreters are cached here, not in the user's home
+            "cache-directory": os.path.join(self.location, "cache"),
+        }
 
     def test_install(self):
         """"""
@@ -424,6 +431,1222 @@ class TestRecipe(unittest.TestCase):
         # there should no auto isort executable
         self.assertNotIn(mappings["isort-path"], generated_settings)
 
+    def test_mypy_daemon(self):
+        """ """
+        from ..recipes import Recipe
+        from ..recipes import mappings
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "mypy-enabled": "True",
+                "mypy-daemon": "True",
+                "mypy-args": "--ignore-missing-imports",
+                "dmypy-path": "${buildout:directory}/bin/dmypy",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        generated_settings = json.loads(
+            read(os.path.join(settings_dir, "settings.json"))
+        )
+        self.assertEqual(
+            generated_settings[mappings["mypy-path"]], self.location + "/bin/dmypy"
+        )
+        mypy_args = generated_settings[mappings["mypy-args"]]
+        self.assertEqual(mypy_args[2:4], ["run", "--"])
+        self.assertEqual(mypy_args[-1], "--ignore-missing-imports")
+
+        # mypy_path comes from eggs locations, without site-packages
+        mypy_config = read(os.path.join(settings_dir, "mypy.ini"))
+        self.assertIn(
+            "mypy_path = " + os.pathsep.join(
+                p
+                for p in generated_settings[mappings["autocomplete-extrapaths"]]
+                if os.path.basename(p) != "site-packages"
+            ),
+            mypy_config,
+        )
+        site_packages = os.path.join(self.location, "lib", "site-packages")
+        recipe._prepare_mypy_daemon_settings(
+            {},
+            ["/eggs/foo.egg", site_packages, "/usr/lib/python3/dist-packages/"],
+            recipe.normalize_options(),
+        )
+        self.assertIn(
+            "mypy_path = /eggs/foo.egg\n",
+            read(os.path.join(settings_dir, "mypy.ini")),
+        )
+
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual(
+            ["mypy daemon: start", "mypy daemon: stop", "mypy daemon: recheck"],
+            [t["label"] for t in tasks],
+        )
+
+        # Tasks are replaced, not duplicated
+        recipe.install()
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual(3, len(tasks))
+
+    def test_performance_defaults(self):
+        """ """
+        from ..recipes import mappings
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "performance-defaults": "True",
+                "mypy-sqlite-cache": "True",
+                "cache-directory": "/tmp/cache",
+                "pylint-enabled": "True",
+                "pylint-path": "/tmp/bin/pylint",
+                "flake8-enabled": "True",
+                "flake8-path": "/tmp/bin/flake8",
+                "flake8-args": "--jobs 2",
+                "mypy-enabled": "True",
+                "mypy-path": "/tmp/bin/mypy",
+                "black-enabled": "True",
+                "black-path": "/tmp/bin/black",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        vsc_settings = recipe._prepare_settings(["/tmp/eggs/egg1.egg"], [], {})
+
+        self.assertEqual(
+            vsc_settings[mappings["pylint-args"]],
+            ["--jobs={0}".format(multiprocessing.cpu_count())],
+        )
+        # user specified arguments win
+        self.assertEqual(vsc_settings[mappings["flake8-args"]], ["--jobs", "2"])
+        self.assertEqual(
+            vsc_settings[mappings["mypy-args"]],
+            ["--cache-dir=/tmp/cache/mypy", "--sqlite-cache"],
+        )
+        self.assertEqual(
+            vsc_settings["terminal.integrated.env.linux"]["BLACK_CACHE_DIR"],
+            "/tmp/cache/black",
+        )
+        self.assertIn(
+            "BLACK_CACHE_DIR=/tmp/cache/black",
+            read(os.path.join(self.location, ".vscode", ".env")),
+        )
+
+        # explicit opt-out wins too
+        buildout["vscode"]["mypy-args"] = "--no-sqlite-cache"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        vsc_settings = recipe._prepare_settings(["/tmp/eggs/egg1.egg"], [], {})
+        self.assertEqual(
+            vsc_settings[mappings["mypy-args"]],
+            ["--no-sqlite-cache", "--cache-dir=/tmp/cache/mypy"],
+        )
+
+        # not enabled linters don't get arguments
+        del buildout["vscode"]["pylint-enabled"]
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        vsc_settings = recipe._prepare_settings(["/tmp/eggs/egg1.egg"], [], {})
+        self.assertNotIn(mappings["pylint-args"], vsc_settings)
+
+    def test_pyright_config(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options["pyright-config"] = "True"
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+
+        _, ws = zc.recipe.egg.Egg(buildout, "vscode", buildout["vscode"]).working_set()
+        dist = ws.by_key["zc.buildout"]
+        locations = recipe._requirements_locations(ws, dist)
+        self.assertIn(dist.location, locations)
+        self.assertIn(ws.by_key["setuptools"].location, locations)
+
+        develop_location = os.path.join(self.location, "src", "my.package")
+        with open(os.path.join(self.location, "pyrightconfig.json"), "w") as fp:
+            json.dump({"typeCheckingMode": "basic"}, fp)
+
+        recipe._write_pyright_config(
+            {develop_location: {develop_location, "/tmp/eggs/egg1.egg"}}
+        )
+        config = json.loads(read(os.path.join(self.location, "pyrightconfig.json")))
+        # user's settings are kept
+        self.assertEqual(config["typeCheckingMode"], "basic")
+        self.assertIn("parts", config["exclude"])
+        self.assertIn("eggs", config["exclude"])
+        self.assertEqual(
+            config["executionEnvironments"],
+            [{"root": "src/my.package", "extraPaths": ["/tmp/eggs/egg1.egg"]}],
+        )
+
+    def test_canonical_locations(self):
+        """ """
+        from ..recipes import canonical_locations
+
+        eggs = os.path.join(self.location, "eggs")
+        mkdir(eggs, "egg1.egg")
+        os.symlink(eggs, os.path.join(self.location, "eggs-link"))
+
+        locations, collapsed = canonical_locations(
+            [
+                os.path.join(eggs, "egg1.egg"),
+                os.path.join(self.location, "eggs-link", "egg1.egg"),
+                os.path.join(eggs, "egg1.egg") + os.sep,
+                os.path.join(eggs, "egg1.egg"),
+                "eggs/egg1.egg",
+                "/tmp/eggs/egg2.egg",
+            ]
+        )
+        # first spelling is kept
+        self.assertEqual(
+            [os.path.join(eggs, "egg1.egg"), "/tmp/eggs/egg2.egg"], locations
+        )
+        # exactly same path is not counted as collapsed duplicate
+        self.assertEqual(3, collapsed)
+
+    def test_symlinked_buildout(self):
+        """ """
+        from ..recipes import canonical_path
+        from ..recipes import Recipe
+        import pkg_resources
+
+        # buildout is used through a symlink, the runtime sees linked paths
+        link = self.location + "-link"
+        os.symlink(self.location, link)
+        self.addCleanup(os.remove, link)
+        buildout = self.buildout
+        buildout["buildout"].update(
+            {
+                "directory": link,
+                "eggs-directory": os.path.join(link, "eggs"),
+                "develop-eggs-directory": os.path.join(link, "develop-eggs"),
+                "bin-directory": os.path.join(link, "bin"),
+            }
+        )
+        mkdir(self.location, "eggs", "foo-1.0.egg")
+        mkdir(self.location, "src")
+        mkdir(self.location, "src", "products")
+        mkdir(self.location, "src", "my.pkg")
+        mkdir(self.location, "src", "my.pkg", "my.pkg.egg-info")
+        write(self.location, "src", "my.pkg", "my.pkg.egg-info", "requires.txt", "foo")
+        write(self.location, "develop-eggs", "my.pkg.egg-link", "")
+
+        foo = os.path.join(link, "eggs", "foo-1.0.egg")
+        develop = os.path.join(link, "src", "my.pkg")
+        # packages written with the real path
+        products = os.path.join(self.location, "src", "products")
+        ws = pkg_resources.WorkingSet([])
+        ws.add(
+            pkg_resources.Distribution(location=foo, project_name="foo", version="1.0")
+        )
+        ws.add(
+            pkg_resources.Distribution(
+                location=develop,
+                project_name="my.pkg",
+                version="1.0",
+                metadata=pkg_resources.PathMetadata(
+                    develop, os.path.join(develop, "my.pkg.egg-info")
+                ),
+            )
+        )
+
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "packages": products,
+                "python-path": sys.executable,
+                "prune-interpreter-paths": "True",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe._working_set = lambda recipe, options: ws
+
+        (
+            eggs_locations,
+            develop_eggs_locations,
+            develop_requirements,
+            distributions,
+        ) = recipe._resolve_working_set()
+        self.assertEqual([foo, develop, products], eggs_locations)
+        self.assertEqual([develop], develop_eggs_locations)
+        self.assertEqual({develop: {foo, develop}}, develop_requirements)
+        self.assertEqual(foo, distributions["foo"]["location"])
+        self.assertEqual(develop, distributions["my.pkg"]["location"])
+
+        self.assertEqual(
+            [
+                [foo, ["foo==1.0"], False],
+                [develop, ["my.pkg==1.0"], True],
+                [products, [], True],
+            ],
+            recipe._location_versions(eggs_locations, distributions),
+        )
+
+        # eggs under eggs-directory are covered by its rule
+        self.assertEqual(
+            [
+                {"path": os.path.join(develop, "**"), "include": True},
+                {"path": os.path.join(products, "**"), "include": True},
+                {"path": os.path.join(link, "eggs", "**"), "include": False},
+            ],
+            recipe._debug_rules(eggs_locations, develop_eggs_locations),
+        )
+
+        # import trace and interpreter have canonical paths
+        write(
+            recipe.settings_dir,
+            "import-trace.json",
+            json.dumps(
+                {
+                    "locations": [canonical_path(develop)],
+                    "path": [canonical_path(foo), canonical_path(develop)],
+                }
+            ),
+        )
+        self.assertEqual(
+            [develop, products],
+            recipe._traced_locations(
+                eggs_locations, eggs_locations, develop_eggs_locations
+            ),
+        )
+        key = "{0}:{1}".format(sys.executable, os.stat(sys.executable).st_mtime)
+        mkdir(recipe_options["cache-directory"])
+        write(
+            recipe_options["cache-directory"],
+            "interpreters.json",
+            json.dumps({key: {"path": [canonical_path(foo)], "version": [3, 0, 0]}}),
+        )
+        self.assertEqual(
+            [develop, products],
+            recipe._editor_locations(eggs_locations, recipe.normalize_options()),
+        )
+
+        # pyright roots are relative to the project root
+        recipe._write_pyright_config(develop_requirements)
+        config = json.loads(read(os.path.join(self.location, "pyrightconfig.json")))
+        self.assertEqual(
+            [
+                {
+                    "root": "src/my.pkg",
+                    "extraPaths": ["eggs/foo-1.0.egg", "src/products"],
+                }
+            ],
+            config["executionEnvironments"],
+        )
+
+    def test_prune_interpreter_paths(self):
+        """ """
+        from ..recipes import canonical_path
+        from ..recipes import interpreter_info
+        from ..recipes import mappings
+        from ..recipes import Recipe
+
+        cache_directory = os.path.join(self.location, "cache")
+        info = interpreter_info(sys.executable, cache_directory)
+        self.assertEqual(list(sys.version_info[:3]), info["version"])
+        self.assertTrue(
+            os.path.exists(os.path.join(cache_directory, "interpreters.json"))
+        )
+        # cached
+        self.assertEqual(info, interpreter_info(sys.executable, cache_directory))
+
+        stdlib = canonical_path(os.path.dirname(os.__file__))
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "python-path": sys.executable,
+                "cache-directory": cache_directory,
+                "prune-interpreter-paths": "True",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        vsc_settings = recipe._prepare_settings(["/tmp/eggs/egg1.egg", stdlib], [], {})
+        self.assertEqual(
+            ["/tmp/eggs/egg1.egg"], vsc_settings[mappings["analysis-extrapaths"]]
+        )
+        # still in PYTHONPATH
+        self.assertIn(stdlib, read(os.path.join(self.location, ".vscode", ".env")))
+
+    def test_export_paths(self):
+        """ """
+        from ..recipes import mappings
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options["export-paths"] = "True"
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+
+        extra_paths = buildout["vscode"]["extra-paths"].splitlines()
+        self.assertTrue(extra_paths)
+        self.assertEqual(
+            os.pathsep.join(extra_paths), buildout["vscode"]["pythonpath"]
+        )
+        self.assertEqual("", buildout["vscode"]["develop-paths"])
+
+        recipe.install()
+        generated_settings = json.loads(
+            read(os.path.join(self.location, ".vscode", "settings.json"))
+        )
+        self.assertEqual(
+            extra_paths, generated_settings[mappings["analysis-extrapaths"]]
+        )
+
+        # eggs option is required
+        del buildout["vscode"]["eggs"]
+        self.assertRaises(UserError, Recipe, buildout, "vscode", buildout["vscode"])
+
+    def test_debug_launch_configurations(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "debug-enabled": "True",
+                "debug-scripts": "instance fg\ntest -t foo",
+                "packages": "/tmp/products",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+
+        # existing configurations are kept
+        write(
+            os.path.join(self.location, ".vscode"),
+            "launch.json",
+            json.dumps({"version": "0.2.0", "configurations": [{"name": "Mine"}]}),
+        )
+        recipe.install()
+        recipe.install()
+
+        launch_json = json.loads(
+            read(os.path.join(self.location, ".vscode", "launch.json"))
+        )
+        configurations = launch_json["configurations"]
+        self.assertEqual(
+            ["Mine", "Python: instance fg", "Python: test -t foo"],
+            [c["name"] for c in configurations],
+        )
+        instance = configurations[1]
+        self.assertEqual("${workspaceFolder}/bin/instance", instance["program"])
+        self.assertEqual(["fg"], instance["args"])
+        self.assertTrue(instance["justMyCode"])
+        self.assertEqual("${workspaceFolder}/.vscode/.env", instance["envFile"])
+        self.assertNotIn("env", instance)
+        self.assertEqual(
+            {"path": "/tmp/products/**", "include": True}, instance["rules"][0]
+        )
+        self.assertEqual(
+            {"path": os.path.join(self.location, "eggs", "**"), "include": False},
+            instance["rules"][1],
+        )
+
+        # customized bin-directory, inside and outside of the project root
+        for bin_directory, program in (
+            (os.path.join(self.location, "scripts"), "${workspaceFolder}/scripts"),
+            ("/opt/bin", "/opt/bin"),
+        ):
+            buildout["buildout"]["bin-directory"] = bin_directory
+            recipe = Recipe(buildout, "vscode", buildout["vscode"])
+            recipe.install()
+            configurations = json.loads(
+                read(os.path.join(self.location, ".vscode", "launch.json"))
+            )["configurations"]
+            self.assertEqual(program + "/instance", configurations[1]["program"])
+
+    def test_parallel_tests(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update({"test-enabled": "True", "test-processes": "3"})
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        changed_tests = os.path.join(settings_dir, "changed_tests.py")
+        self.assertTrue(os.path.exists(changed_tests))
+
+        distributions = {
+            "my.pkg": {"location": "/tmp/my.pkg/src", "develop": True},
+            "My-Dist": {
+                "location": "/tmp/My-Dist/src",
+                "develop": True,
+                "top-level": ["my_dist", "my_helpers"],
+            },
+            "zc.buildout": {"location": "/tmp/eggs", "develop": False},
+        }
+        recipe._prepare_tests(
+            "/usr/bin/python", distributions, [], recipe.normalize_options()
+        )
+
+        tasks_json = json.loads(read(os.path.join(settings_dir, "tasks.json")))
+        tasks = tasks_json["tasks"]
+        self.assertEqual(
+            [
+                "Test: develop eggs",
+                "Test: develop eggs (layer)",
+                "Test: changed packages",
+            ],
+            [t["label"] for t in tasks],
+        )
+        self.assertEqual("${workspaceFolder}/bin/test", tasks[0]["command"])
+        # top level packages, project name only without top_level.txt
+        self.assertEqual(
+            ["-j", "3", "-s", "my.pkg", "-s", "my_dist", "-s", "my_helpers"],
+            tasks[0]["args"],
+        )
+        self.assertEqual("${input:testLayer}", tasks[1]["args"][-1])
+        self.assertEqual(["testLayer"], [i["id"] for i in tasks_json["inputs"]])
+        self.assertEqual("/usr/bin/python", tasks[2]["command"])
+        self.assertEqual(
+            [changed_tests, "${workspaceFolder}/bin/test", "-j", "3"], tasks[2]["args"]
+        )
+
+        configurations = json.loads(read(os.path.join(settings_dir, "launch.json")))[
+            "configurations"
+        ]
+        self.assertEqual(
+            ["Test: develop eggs", "Test: changed packages"],
+            [c["name"] for c in configurations],
+        )
+        self.assertEqual(tasks[0]["args"], configurations[0]["args"])
+        self.assertEqual(changed_tests, configurations[1]["program"])
+
+        # project root other than buildout directory
+        buildout["vscode"]["project-root"] = os.path.join(self.location, "project")
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        script, _ = recipe._test_command(distributions, recipe.normalize_options())
+        self.assertEqual(os.path.join(self.location, "bin", "test"), script)
+
+        write(
+            settings_dir,
+            "vs-recipe-paths.json",
+            json.dumps({"distributions": distributions}),
+        )
+        self.assertEqual(
+            [
+                (["my.pkg"], "/tmp/my.pkg/src"),
+                (["my_dist", "my_helpers"], "/tmp/My-Dist/src"),
+            ],
+            runpy.run_path(changed_tests)["develop_packages"](),
+        )
+
+    def write_local_eggs(self, eggs):
+        """my.pkg 1.0 requiring other.pkg (1.0 and 2.0) in eggs directory."""
+        mkdir(eggs)
+        python = "py{0}.{1}".format(*sys.version_info[:2])
+        for name, version, requires in (
+            ("my.pkg", "1.0", "other.pkg"),
+            ("other.pkg", "1.0", ""),
+            ("other.pkg", "2.0", ""),
+        ):
+            egg = os.path.join(eggs, "{0}-{1}-{2}.egg".format(name, version, python))
+            mkdir(egg)
+            mkdir(egg, "EGG-INFO")
+            write(
+                egg,
+                "EGG-INFO",
+                "PKG-INFO",
+                "Metadata-Version: 1.0\nName: {0}\nVersion: {1}\n".format(
+                    name, version
+                ),
+            )
+            write(egg, "EGG-INFO", "requires.txt", requires)
+
+    def test_offline_working_set(self):
+        """ """
+        from ..recipes import directory_environment
+        from ..recipes import offline_working_set
+        from zc.buildout import UserError
+
+        eggs = os.path.join(self.location, "local-eggs")
+        self.write_local_eggs(eggs)
+
+        ws = offline_working_set(["my.pkg"], [eggs])
+        self.assertEqual("2.0", ws.by_key["other.pkg"].version)
+        # scanned eggs directory is reused
+        self.assertIs(directory_environment(eggs), directory_environment(eggs))
+
+        # pinned version
+        ws = offline_working_set(["my.pkg"], [eggs], {"other.pkg": "1.0"})
+        self.assertEqual("1.0", ws.by_key["other.pkg"].version)
+
+        with self.assertRaises(UserError) as context:
+            offline_working_set(["my.pkg", "missing.pkg"], [eggs])
+        self.assertIn("missing.pkg", str(context.exception))
+
+    def test_offline_resolution(self):
+        """ """
+        from ..recipes import Recipe
+        from zc.buildout import UserError
+
+        buildout = self.buildout
+        eggs = os.path.join(self.location, "local-eggs")
+        buildout["buildout"]["eggs-directory"] = eggs
+        self.write_local_eggs(eggs)
+        buildout["vscode"] = self.recipe_options.copy()
+        # opt-in, also for offline buildout
+        buildout["buildout"]["offline"] = "true"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        self.assertEqual("False", recipe.options["offline-resolution"])
+
+        buildout["vscode"]["offline-resolution"] = "True"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        ws = recipe._working_set("dummy", {"eggs": "my.pkg"})
+        self.assertEqual(["my.pkg", "other.pkg"], sorted(ws.by_key))
+
+        # buildout's own sys.path is not searched
+        with self.assertRaises(UserError):
+            recipe._working_set("dummy", {"eggs": "my.pkg\nzc.buildout"})
+
+    def test_import_trace(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {"import-trace": "True", "import-trace-scripts": "test -t foo"}
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        import_trace = os.path.join(settings_dir, "import_trace.py")
+        self.assertTrue(os.path.exists(import_trace))
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual("Import trace: test -t foo", tasks[0]["label"])
+        self.assertEqual(
+            [import_trace, "${workspaceFolder}/bin/test", "-t", "foo"],
+            tasks[0]["args"],
+        )
+
+        # without trace nothing is dropped
+        locations = ["/omelette", "/eggs/a.egg", "/eggs/b.egg", "/src/my.pkg"]
+        eggs = locations[1:]
+        self.assertEqual(
+            locations, recipe._traced_locations(locations, eggs, ["/src/my.pkg"])
+        )
+
+        trace = {
+            "locations": ["/eggs/b.egg", "/usr/lib/python"],
+            "path": ["/eggs/a.egg", "/eggs/b.egg", "/src/my.pkg", "/usr/lib/python"],
+        }
+        write(settings_dir, "import-trace.json", json.dumps(trace))
+        self.assertEqual(
+            ["/omelette", "/eggs/b.egg", "/src/my.pkg"],
+            recipe._traced_locations(locations, eggs, ["/src/my.pkg"]),
+        )
+
+        # upgraded egg was not in the traced path, it is kept until traced again
+        upgraded = ["/omelette", "/eggs/a.egg", "/eggs/b-2.0.egg", "/src/my.pkg"]
+        trace["locations"] = ["/eggs/a.egg"]
+        write(settings_dir, "import-trace.json", json.dumps(trace))
+        self.assertEqual(
+            ["/omelette", "/eggs/a.egg", "/eggs/b-2.0.egg", "/src/my.pkg"],
+            recipe._traced_locations(upgraded, upgraded[1:], ["/src/my.pkg"]),
+        )
+
+        # untraced eggs are dropped only from analysis extraPaths
+        generated_settings = json.loads(
+            read(os.path.join(settings_dir, "vs-recipe-generated-settings.json"))
+        )
+        trace["path"] = generated_settings["python.autoComplete.extraPaths"]
+        write(settings_dir, "import-trace.json", json.dumps(trace))
+        recipe.install()
+        generated_settings = json.loads(
+            read(os.path.join(settings_dir, "vs-recipe-generated-settings.json"))
+        )
+        self.assertTrue(generated_settings["python.autoComplete.extraPaths"])
+        self.assertEqual([], generated_settings["python.analysis.extraPaths"])
+
+    def test_version_conflicts(self):
+        """ """
+        from ..recipes import Recipe
+        import pkg_resources
+
+        eggs = os.path.join(self.location, "eggs")
+        site_packages = os.path.join(self.location, "site-packages")
+
+        def working_set(*dists):
+            ws = pkg_resources.WorkingSet([])
+            for location, project_name, version in dists:
+                ws.add(
+                    pkg_resources.Distribution(
+                        location=location, project_name=project_name, version=version
+                    )
+                )
+            return ws
+
+        working_sets = {
+            # part vscode
+            "collective.recipe.vscode": working_set(
+                (os.path.join(eggs, "foo-2.0.egg"), "foo", "2.0"),
+                (site_packages, "bar", "1.0"),
+            ),
+            # part dummy
+            "zc.recipe.egg": working_set(
+                (site_packages, "foo", "1.0"), (site_packages, "bar", "1.0")
+            ),
+        }
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe._working_set = lambda recipe, options: working_sets[recipe]
+
+        eggs_locations, _, _, distributions = recipe._resolve_working_set()
+        self.assertEqual(
+            [os.path.join(eggs, "foo-2.0.egg"), site_packages], eggs_locations
+        )
+        self.assertEqual("2.0", distributions["foo"]["version"])
+
+        # older is in site-packages, which is still needed for bar
+        buildout["vscode"]["version-conflict-policy"] = "oldest"
+        eggs_locations, _, _, distributions = recipe._resolve_working_set()
+        self.assertEqual([site_packages], eggs_locations)
+        self.assertEqual("1.0", distributions["foo"]["version"])
+
+        buildout["vscode"]["version-conflict-policy"] = "primary"
+        with self.assertRaises(UserError):
+            recipe._resolve_working_set()
+        buildout["vscode"]["primary-part"] = "dummy"
+        _, _, _, distributions = recipe._resolve_working_set()
+        self.assertEqual("1.0", distributions["foo"]["version"])
+
+    def test_cache_gc(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "cache-gc": "True",
+                "cache-budgets": "profiles 0 30",
+                "cache-directory": os.path.join(self.location, "cache"),
+                "background-steps": "False",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        settings_dir = os.path.join(self.location, ".vscode")
+        mkdir(settings_dir, "profiles")
+        mkdir(settings_dir, "profiles", "20200101-000000")
+        write(settings_dir, "profiles", "20200101-000000", "cprofile.prof", "x")
+        recipe.install()
+
+        # size budget of profiles is zero
+        self.assertEqual([], os.listdir(os.path.join(settings_dir, "profiles")))
+
+        buildout["vscode"]["cache-budgets"] = "unknown 1 1"
+        with self.assertRaises(UserError):
+            recipe.install()
+
+    @unittest.skipIf(sys.version_info < (3, 8), "pycache_prefix is Python 3.8+")
+    def test_bytecode_precompile(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "bytecode-precompile": "True",
+                "cache-directory": os.path.join(self.location, "cache"),
+                "background-steps": "False",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        prefix = os.path.join(self.location, "cache", "pycache")
+        self.assertEqual(prefix, recipe.options["pycache-prefix"])
+
+        settings = recipe._prepare_settings([self.location], [], {})
+        self.assertEqual(
+            prefix, settings["terminal.integrated.env.linux"]["PYTHONPYCACHEPREFIX"]
+        )
+        env_file = read(os.path.join(self.location, ".vscode", ".env"))
+        self.assertIn("PYTHONPYCACHEPREFIX={0}".format(prefix), env_file)
+
+        mkdir(self.location, "foo-1.0.egg")
+        write(self.location, "foo-1.0.egg", "foo.py", "FOO = 1\n")
+        egg = os.path.join(self.location, "foo-1.0.egg")
+        step = recipe._bytecode_step(
+            sys.executable,
+            [egg],
+            {"foo": {"location": egg, "version": "1.0", "develop": False}},
+            prefix,
+        )
+        self.assertEqual([[egg, ["foo==1.0"], False]], step[2]["locations"])
+        recipe._run_steps([step], recipe.normalize_options())
+        self.assertEqual(["foo.py"], os.listdir(egg))
+        self.assertTrue(os.path.isdir(prefix + os.path.realpath(egg)))
+
+        # not enabled
+        buildout["vscode"]["bytecode-precompile"] = "False"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        settings = recipe._prepare_settings([self.location], [], {})
+        self.assertNotIn(
+            "PYTHONPYCACHEPREFIX", settings["terminal.integrated.env.linux"]
+        )
+
+    def test_zcml_index(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update({"zcml-index": "True", "background-steps": "False"})
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        installed = recipe.install()
+
+        # validator is installed with the recipe, buildout removes it with the part
+        script = os.path.join(self.location, "bin", "vscode-zcml")
+        self.assertIn(script, installed)
+        process = subprocess.Popen(
+            [script, "--project-root", self.location],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        output, _ = process.communicate()
+        self.assertEqual(0, process.returncode, output)
+        self.assertIn(b"0 problem(s)", output)
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        self.assertTrue(os.path.exists(os.path.join(settings_dir, "zcml.json")))
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual(["ZCML: validate"], [t["label"] for t in tasks])
+        self.assertEqual("${workspaceFolder}/bin/vscode-zcml", tasks[0]["command"])
+        self.assertEqual(["--project-root", self.location], tasks[0]["args"])
+        self.assertEqual("zcml", tasks[0]["problemMatcher"]["owner"])
+
+    def test_background_steps(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update({"background-steps": "False"})
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        status_file = os.path.join(settings_dir, "vs-recipe-background.json")
+        # nothing to run
+        self.assertFalse(os.path.exists(status_file))
+
+        step = recipe._symbol_index_step([self.location], {})
+        self.assertEqual("collective.recipe.vscode.symbols:build_index", step[1])
+        self.assertEqual([[self.location, [], False]], step[2]["locations"])
+
+        # synchronous run, results are ready when buildout finishes
+        recipe._run_steps([step], recipe.normalize_options())
+        self.assertTrue(os.path.exists(os.path.join(settings_dir, "tags")))
+        status = json.loads(read(status_file))
+        self.assertEqual("done", status["state"])
+        self.assertEqual("done", status["steps"]["symbol-index"]["state"])
+
+    def test_coverage(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update({"coverage-enabled": "True", "test-processes": "2"})
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        generated_settings = json.loads(
+            read(os.path.join(settings_dir, "vs-recipe-generated-settings.json"))
+        )
+        self.assertEqual(
+            ".vscode", generated_settings["coverage-gutters.coverageBaseDir"]
+        )
+        self.assertEqual(
+            ["coverage.xml"], generated_settings["coverage-gutters.coverageFileNames"]
+        )
+
+        distributions = {
+            "my.pkg": {"location": "/tmp/my.pkg/src", "develop": True},
+        }
+        options = recipe.normalize_options()
+        recipe._prepare_coverage(
+            sys.executable, ["/tmp/my.pkg/src"], distributions, options
+        )
+        rcfile = os.path.join(settings_dir, ".coveragerc")
+        coveragerc = read(rcfile)
+        self.assertIn("source =\n    /tmp/my.pkg/src\n", coveragerc)
+        self.assertIn("parallel = True", coveragerc)
+        self.assertIn(
+            "output = " + os.path.join(settings_dir, "coverage.xml"), coveragerc
+        )
+
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual(
+            ["Coverage: run tests", "Coverage: combine", "Coverage: develop eggs"],
+            [t["label"] for t in tasks],
+        )
+        self.assertEqual(
+            ["-m", "coverage", "run", "--rcfile", rcfile, "${workspaceFolder}/bin/test"]
+            + ["-j", "2", "-s", "my.pkg"],
+            tasks[0]["args"],
+        )
+        if sys.version_info >= (3, 12):
+            self.assertEqual("sysmon", tasks[0]["options"]["env"]["COVERAGE_CORE"])
+        else:
+            self.assertEqual({}, tasks[0]["options"]["env"])
+        self.assertEqual("sequence", tasks[2]["dependsOrder"])
+
+    def test_profiling(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "profile-enabled": "True",
+                "profile-scripts": "instance fg",
+                "py-spy-path": os.path.join(self.location, "py-spy"),
+            }
+        )
+        # records its arguments
+        py_spy = os.path.join(self.location, "py-spy")
+        write(py_spy, '#!/bin/sh\necho "$@" > "{0}.args"\n'.format(py_spy))
+        os.chmod(py_spy, 0o755)
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        profile_run = os.path.join(settings_dir, "profile_run.py")
+        self.assertTrue(os.path.exists(profile_run))
+
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual(
+            [
+                "Profile: instance fg (cProfile)",
+                "Profile: instance fg (tracemalloc)",
+                "Profile: instance fg (py-spy)",
+                "Profile: summary of latest cProfile",
+            ],
+            [t["label"] for t in tasks],
+        )
+        self.assertEqual(
+            [profile_run, "cprofile", "${workspaceFolder}/bin/instance", "fg"],
+            tasks[0]["args"],
+        )
+        self.assertEqual([profile_run, "summary"], tasks[3]["args"])
+
+        # generated arguments are accepted by the script
+        profile_main = runpy.run_path(profile_run)["main"]
+        self.assertEqual(0, profile_main(tasks[2]["args"][1:]))
+        recorded = read(py_spy + ".args").split()
+        self.assertEqual(
+            ["--", sys.executable, "${workspaceFolder}/bin/instance", "fg"],
+            recorded[-4:],
+        )
+        self.assertEqual(["record", "--subprocesses"], recorded[:2])
+
+        configurations = json.loads(read(os.path.join(settings_dir, "launch.json")))[
+            "configurations"
+        ]
+        self.assertEqual(
+            ["Profile: instance fg (cProfile)", "Profile: instance fg (tracemalloc)"],
+            [c["name"] for c in configurations],
+        )
+        self.assertEqual(profile_run, configurations[1]["program"])
+        self.assertEqual(tasks[1]["args"][1:], configurations[1]["args"])
+
+    def test_robot_libspec_cache(self):
+        """ """
+        from ..recipes import mappings
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update({"robot-enabled": "True", "robot-libspec-cache": "True"})
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        libspec_dir = os.path.join(self.location, ".vscode", "libspec")
+
+        # user's own entries are kept, libspec directory is added once
+        existing_settings = {mappings["robot-pythonpath"]: ["resources", libspec_dir]}
+        vsc_settings = recipe._prepare_settings([], [], existing_settings)
+        self.assertEqual(
+            ["resources", libspec_dir], vsc_settings[mappings["robot-pythonpath"]]
+        )
+
+        buildout["vscode"]["robot-libspec-cache"] = "False"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        vsc_settings = recipe._prepare_settings([], [], existing_settings)
+        self.assertEqual(["resources"], vsc_settings[mappings["robot-pythonpath"]])
+        existing_settings = {mappings["robot-pythonpath"]: [libspec_dir]}
+        vsc_settings = recipe._prepare_settings([], [], existing_settings)
+        self.assertNotIn(mappings["robot-pythonpath"], vsc_settings)
+        self.assertNotIn(mappings["robot-pythonpath"], existing_settings)
+
+    def test_robot_testing_layers(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "robot-enabled": "True",
+                "robot-testing-layers": "my.pkg.testing.MY_PKG_ROBOT_TESTING\n"
+                "other.pkg.testing.OTHER_PKG_ROBOT_TESTING",
+                "robot-server-port": "56001",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual(
+            [
+                "Start Plone Test Server",
+                "Start Plone Test Server: MY_PKG_ROBOT_TESTING",
+                "Start Plone Test Server: OTHER_PKG_ROBOT_TESTING",
+            ],
+            [t["label"] for t in tasks],
+        )
+        self.assertTrue(tasks[2]["isBackground"])
+        self.assertTrue(
+            tasks[2]["command"].startswith("LISTENER_PORT=50000 ZSERVER_PORT=56002 ")
+        )
+        self.assertIn("background", tasks[2]["problemMatcher"])
+
+        configurations = json.loads(read(os.path.join(settings_dir, "launch.json")))[
+            "configurations"
+        ]
+        self.assertEqual(
+            [
+                "Robot Framework: Launch Template",
+                "Robot Framework: MY_PKG_ROBOT_TESTING",
+                "Robot Framework: OTHER_PKG_ROBOT_TESTING",
+            ],
+            [c["name"] for c in configurations],
+        )
+        other = configurations[2]
+        self.assertEqual(tasks[2]["label"], other["preLaunchTask"])
+        self.assertIn("ZOPE_port:56002", other["args"])
+        self.assertEqual(50000, other["env"]["LISTENER_PORT"])
+        # template is not changed
+        self.assertIn("ZOPE_port:55001", configurations[0]["args"])
+
+        # user's own tasks are kept, those no longer generated are removed
+        tasks_json = json.loads(read(os.path.join(settings_dir, "tasks.json")))
+        tasks_json["tasks"].append({"label": "Mine"})
+        write(settings_dir, "tasks.json", json.dumps(tasks_json))
+        buildout["vscode"][
+            "robot-testing-layers"
+        ] = "my.pkg.testing.MY_PKG_ROBOT_TESTING"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual(
+            [
+                "Mine",
+                "Start Plone Test Server",
+                "Start Plone Test Server: MY_PKG_ROBOT_TESTING",
+            ],
+            [t["label"] for t in tasks],
+        )
+        self.assertEqual("collective.recipe.vscode", tasks[1]["detail"])
+        configurations = json.loads(read(os.path.join(settings_dir, "launch.json")))[
+            "configurations"
+        ]
+        self.assertEqual(
+            [
+                "Robot Framework: Launch Template",
+                "Robot Framework: MY_PKG_ROBOT_TESTING",
+            ],
+            [c["name"] for c in configurations],
+        )
+        self.assertEqual(
+            "collective.recipe.vscode", configurations[1]["presentation"]["group"]
+        )
+
+    def test_compact_settings(self):
+        """ """
+        from ..recipes import mappings
+        from ..recipes import Recipe
+        from ..recipes import terminal_platform
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "compact-settings": "True",
+                "robot-enabled": "True",
+                "black-enabled": "True",
+                "performance-defaults": "True",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+
+        egg = os.path.join(self.location, "eggs", "foo-1.0.egg")
+        existing_settings = {
+            "terminal.integrated.env.linux": {},
+            "terminal.integrated.env.osx": {},
+            "terminal.integrated.env.windows": {},
+            mappings["autocomplete-extrapaths"]: [],
+        }
+        settings = recipe._prepare_settings(
+            [egg, "/tmp/eggs/egg1.egg"], [], existing_settings
+        )
+        relative = ["${workspaceFolder}/eggs/foo-1.0.egg", "/tmp/eggs/egg1.egg"]
+        pythonpath = os.pathsep.join(relative + ["${PYTHONPATH}"])
+        current = "terminal.integrated.env." + terminal_platform()
+        self.assertEqual(
+            [current], [k for k in settings if k.startswith("terminal.integrated")]
+        )
+        self.assertEqual([current], list(existing_settings))
+        # PYTHONPATH comes from .env only
+        self.assertEqual(["BLACK_CACHE_DIR"], list(settings[current]))
+        self.assertEqual(
+            pythonpath, settings[mappings["robot-python-env"]]["PYTHONPATH"]
+        )
+        self.assertTrue(settings["python.terminal.useEnvFile"])
+        self.assertEqual(relative, settings[mappings["analysis-extrapaths"]])
+        self.assertNotIn(mappings["autocomplete-extrapaths"], settings)
+        # .env keeps absolute paths
+        env_file = read(os.path.join(self.location, ".vscode", ".env"))
+        self.assertIn(egg, env_file)
+
+        # nothing left for the terminal without tools environment
+        buildout["vscode"]["performance-defaults"] = "False"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        settings = recipe._prepare_settings([egg], [], existing_settings)
+        self.assertEqual(
+            [], [k for k in settings if k.startswith("terminal.integrated")]
+        )
+        self.assertEqual([], list(existing_settings))
+
+        recipe.install()
+        configurations = json.loads(
+            read(os.path.join(self.location, ".vscode", "launch.json"))
+        )["configurations"]
+        self.assertNotIn("PYTHONPATH", configurations[0]["env"])
+        self.assertEqual(
+            "${workspaceFolder}/.vscode/.env", configurations[0]["envFile"]
+        )
+
+    def test_robot_pabot(self):
+        """ """
+        from ..recipes import Recipe
+
+        buildout = self.buildout
+        recipe_options = self.recipe_options.copy()
+        recipe_options.update(
+            {
+                "robot-enabled": "True",
+                "robot-pabot-enabled": "True",
+                "robot-pabot-processes": "2",
+            }
+        )
+        buildout["vscode"] = recipe_options
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        recipe.install()
+
+        settings_dir = os.path.join(self.location, ".vscode")
+        worker = os.path.join(settings_dir, "pabot_worker.py")
+        self.assertTrue(os.path.exists(worker))
+
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertEqual(
+            [
+                "Start Plone Test Server",
+                "Start Plone Test Server: pabot #0",
+                "Start Plone Test Server: pabot #1",
+                "Start Plone Test Servers: pabot",
+                "Robot Framework: pabot",
+            ],
+            [t["label"] for t in tasks],
+        )
+        self.assertTrue(
+            tasks[2]["command"].startswith("LISTENER_PORT=50002 ZSERVER_PORT=56002 ")
+        )
+        self.assertEqual("parallel", tasks[3]["dependsOrder"])
+        self.assertEqual([t["label"] for t in tasks[1:3]], tasks[3]["dependsOn"])
+        pabot = tasks[4]
+        self.assertEqual(["-m", "pabot.pabot", "--processes", "2"], pabot["args"][:4])
+        self.assertIn(worker, pabot["args"])
+        self.assertEqual("56001", pabot["options"]["env"]["PABOT_ZOPE_PORT"])
+        self.assertIn("PYTHONPATH", pabot["options"]["env"])
+
+        launch_json = json.loads(read(os.path.join(settings_dir, "launch.json")))
+        launch = launch_json["configurations"][-1]
+        self.assertEqual("Robot Framework: pabot", launch["name"])
+        self.assertEqual("pabot.pabot", launch["module"])
+        self.assertEqual(pabot["args"][2:], launch["args"])
+        self.assertEqual(tasks[3]["label"], launch["preLaunchTask"])
+        # inputs are file local, launch.json has its own
+        self.assertIn("${input:robotSuites}", launch["args"])
+        self.assertEqual(["robotSuites"], [i["id"] for i in launch_json["inputs"]])
+
+        # servers of dropped processes are removed, inputs when no longer used
+        buildout["vscode"]["robot-pabot-processes"] = "1"
+        Recipe(buildout, "vscode", buildout["vscode"]).install()
+        tasks = json.loads(read(os.path.join(settings_dir, "tasks.json")))["tasks"]
+        self.assertNotIn(
+            "Start Plone Test Server: pabot #1", [t["label"] for t in tasks]
+        )
+        buildout["vscode"]["robot-pabot-enabled"] = "False"
+        Recipe(buildout, "vscode", buildout["vscode"]).install()
+        tasks_json = json.loads(read(os.path.join(settings_dir, "tasks.json")))
+        self.assertEqual(
+            ["Start Plone Test Server"], [t["label"] for t in tasks_json["tasks"]]
+        )
+        self.assertEqual(
+            ["ploneTestingLayer"], [i["id"] for i in tasks_json["inputs"]]
+        )
+        launch_json = json.loads(read(os.path.join(settings_dir, "launch.json")))
+        self.assertEqual([], launch_json["inputs"])
+        buildout["vscode"]["robot-pabot-enabled"] = "True"
+
+        # listener ports of pabot processes follow those of testing layers
+        buildout["vscode"]["robot-testing-layers"] = "A B C D"
+        options = Recipe(buildout, "vscode", buildout["vscode"]).normalize_options()
+        self.assertEqual(50003, options["robot-pabot-listener-port"])
+
+        buildout["vscode"]["robot-pabot-listener-port"] = "50001"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        self.assertRaises(UserError, recipe.normalize_options)
+        buildout["vscode"]["robot-pabot-listener-port"] = "50003"
+        buildout["vscode"]["robot-pabot-port"] = "55003"
+        recipe = Recipe(buildout, "vscode", buildout["vscode"])
+        self.assertRaises(UserError, recipe.normalize_options)
+
     def tearDown(self):
         os.chdir(self.here)
         rmtree.rmtree(self.location)
@@ -444,9 +1667,12 @@ class TestRecipeUninstall(unittest.TestCase):
         # Set eggs
         self.buildout["buildout"]["directory"] = self.location
 
-        self.recipe_options = dict(
-            recipe="collective.recipe.vscode", eggs="zc.recipe.egg\nzc.buildout"
-        )
+        self.recipe_options = {
+            "recipe": "collective.recipe.vscode",
+            "eggs": "zc.recipe.egg\nzc.buildout",
+            # probed interpreters are cached here, not in the user's home
+            "cache-directory": os.path.join(self.location, "cache"),
+        }
 
     def test_uninstall(self):
         """ """
@@ -460,7 +1686,69 @@ class TestRecipeUninstall(unittest.TestCase):
         recipe._set_defaults()
         recipe.install()
 
+        settings_dir = os.path.join(self.location, ".vscode")
+        mkdir(settings_dir, "profiles")
+        mkdir(settings_dir, "libspec")
+        for filename in (
+            "tags",
+            "symbols.json",
+            "zcml.json",
+            "import-trace.json",
+            ".coverage",
+            ".coverage.host.1.2",
+            "coverage.xml",
+            "mypy.ini",
+            "dmypy.json",
+            "vs-recipe-background.json",
+            "vs-recipe-background.lock",
+            "vs-recipe-background-job.json",
+            "vs-recipe-background.log",
+            "vs-recipe-background.log.1",
+        ):
+            write(settings_dir, filename, "")
+        write(settings_dir, "settings.json", "{}")
+        write(
+            self.location,
+            "pyrightconfig.json",
+            json.dumps({"typeCheckingMode": "basic", "executionEnvironments": []}),
+        )
+        write(
+            settings_dir,
+            "tasks.json",
+            json.dumps(
+                {
+                    "tasks": [
+                        {"label": "Mine"},
+                        {"label": "Generated", "detail": "collective.recipe.vscode"},
+                    ]
+                }
+            ),
+        )
         uninstall(recipe.name, recipe.options)
+        # user's own tasks are kept
+        self.assertEqual(
+            {"tasks": [{"label": "Mine"}]},
+            json.loads(read(os.path.join(settings_dir, "tasks.json"))),
+        )
+        os.unlink(os.path.join(settings_dir, "tasks.json"))
+
+        # only user's files and incremental indexes are kept
+        self.assertEqual(
+            [".env", "libspec", "settings.json", "symbols.json", "tags", "zcml.json"],
+            sorted(os.listdir(settings_dir)),
+        )
+        # user's own pyright settings are kept
+        self.assertEqual(
+            {"typeCheckingMode": "basic"},
+            json.loads(read(os.path.join(self.location, "pyrightconfig.json"))),
+        )
+        write(
+            self.location, "pyrightconfig.json", json.dumps({"exclude": ["parts"]})
+        )
+        uninstall(recipe.name, recipe.options)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.location, "pyrightconfig.json"))
+        )
 
     def tearDown(self):
         os.chdir(self.here)
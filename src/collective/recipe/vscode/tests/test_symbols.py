@@ -0,0 +1,88 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import mkdir
+from zc.buildout.testing import write
+
+import json
+import os
+import tempfile
+import unittest
+
+
+MODULE = """
+from zope.interface import Interface
+
+
+class IFoo(Interface):
+    def bar():
+        pass
+
+
+class Foo(object):
+    def bar(self):
+        pass
+
+
+def baz():
+    pass
+"""
+
+
+class TestSymbols(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+        self.egg = os.path.join(self.location, "my.pkg-1.0.egg")
+        mkdir(self.egg)
+        mkdir(self.egg, "my")
+        mkdir(self.egg, "my", "pkg")
+        write(self.egg, "my", "__init__.py", "")
+        write(self.egg, "my", "pkg", "__init__.py", MODULE)
+        write(self.egg, "my", "pkg", "py2.py", "print 'python 2'")
+        self.index_dir = os.path.join(self.location, ".vscode")
+        mkdir(self.index_dir)
+
+    def test_index_location(self):
+        """ """
+        from ..symbols import index_location
+
+        location, symbols = index_location(self.egg)
+        self.assertEqual(self.egg, location)
+        kinds = dict((s[0], s[1]) for s in symbols if s[1] != "member")
+        self.assertEqual("module", kinds["my.pkg"])
+        # not parsable module is still indexed as module
+        self.assertEqual("module", kinds["my.pkg.py2"])
+        self.assertEqual("interface", kinds["IFoo"])
+        self.assertEqual("class", kinds["Foo"])
+        self.assertEqual("function", kinds["baz"])
+        init = os.path.join("my", "pkg", "__init__.py")
+        self.assertIn(["bar", "member", init, 11, "my.pkg.Foo"], symbols)
+
+    def test_build_index(self):
+        """ """
+        from ..symbols import build_index
+
+        locations = [[self.egg, ["my.pkg==1.0"], False], ["/not/existing", [], False]]
+        self.assertEqual((1, 0), build_index(self.index_dir, locations, processes=2))
+        with open(os.path.join(self.index_dir, "symbols.json")) as fp:
+            index = json.load(fp)
+        self.assertEqual([self.egg], list(index["locations"]))
+
+        with open(os.path.join(self.index_dir, "tags")) as fp:
+            tags = fp.read().splitlines()
+        self.assertTrue(tags[0].startswith("!_TAG_FILE_FORMAT"))
+        self.assertIn(
+            'baz\t{0}\t15;"\tkind:function\tmodule:my.pkg'.format(
+                os.path.join(self.egg, "my", "pkg", "__init__.py")
+            ),
+            tags,
+        )
+
+        # unchanged eggs are not parsed again
+        self.assertEqual((0, 1), build_index(self.index_dir, locations, processes=2))
+        locations[0][1] = ["my.pkg==1.1"]
+        self.assertEqual((1, 0), build_index(self.index_dir, locations, processes=2))
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
@@ -0,0 +1,115 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import mkdir
+from zc.buildout.testing import write
+
+import json
+import os
+import stat
+import tempfile
+import unittest
+
+
+FAKE_MYPY = """#!/bin/sh
+echo "$MYPYPATH" > mypypath.txt
+echo "my/pkg/__init__.py:1:5: error: Name 'x' is not defined"
+echo "my/pkg/__init__.py:2: note: See docs"
+exit 1
+"""
+
+
+class TestTypecheck(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+        self.develop = os.path.join(self.location, "src", "my.pkg")
+        mkdir(self.location, "src")
+        mkdir(self.develop)
+        mkdir(self.develop, "my")
+        write(self.develop, "my", "__init__.py", "")
+        write(self.develop, "setup.py", "")
+        mkdir(self.develop, "my.pkg.egg-info")
+
+        self.mypy = os.path.join(self.location, "mypy")
+        write(self.mypy, FAKE_MYPY)
+        os.chmod(self.mypy, os.stat(self.mypy).st_mode | stat.S_IEXEC)
+
+    def test_package_targets(self):
+        """ """
+        from ..typecheck import package_targets
+
+        self.assertEqual(
+            [os.path.join(self.develop, "my")], package_targets(self.develop)
+        )
+
+    def test_check_package(self):
+        """ """
+        from ..typecheck import check_package
+
+        result = check_package(
+            (
+                "mypy",
+                self.mypy,
+                self.develop,
+                ["/tmp/eggs/egg1.egg", "/usr/lib/python3/site-packages"],
+            )
+        )
+        self.assertEqual(1, result["returncode"])
+        self.assertIsNone(result["error"])
+        # notes are not counted
+        self.assertEqual(1, len(result["diagnostics"]))
+        with open(os.path.join(self.develop, "mypypath.txt")) as fp:
+            self.assertEqual(
+                os.pathsep.join([self.develop, "/tmp/eggs/egg1.egg"]),
+                fp.read().strip(),
+            )
+
+        result = check_package(("mypy", "/not/existing/mypy", self.develop, []))
+        self.assertIsNotNone(result["error"])
+
+    def test_main(self):
+        """ """
+        from ..recipes import PATHS_FILE
+        from ..typecheck import main
+
+        mkdir(self.location, ".vscode")
+        write(
+            self.location,
+            ".vscode",
+            PATHS_FILE,
+            json.dumps(
+                {
+                    "python": "python",
+                    "eggs": [self.develop],
+                    "develop": [self.develop],
+                    "develop-requirements": {},
+                    "packages": [],
+                }
+            ),
+        )
+        report = os.path.join(self.location, "report.json")
+        exit_code = main(
+            [
+                "--project-root",
+                self.location,
+                "--executable",
+                self.mypy,
+                "--processes",
+                "2",
+                "--json",
+                report,
+            ]
+        )
+        self.assertEqual(1, exit_code)
+        with open(report) as fp:
+            results = json.load(fp)
+        self.assertEqual([self.develop], [r["location"] for r in results])
+
+        # paths file is not written yet
+        with self.assertRaises(SystemExit) as context:
+            main(["--project-root", os.path.join(self.location, "missing")])
+        self.assertEqual(2, context.exception.code)
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
@@ -0,0 +1,158 @@
+# _*_ coding: utf-8 _*_
+from zc.buildout import rmtree
+from zc.buildout.testing import mkdir
+from zc.buildout.testing import write
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+
+CONFIGURE_ZCML = """<configure
+    xmlns="http://namespaces.zope.org/zope"
+    xmlns:browser="http://namespaces.zope.org/browser"
+    xmlns:zcml="http://namespaces.zope.org/zcml">
+
+  <include package=".browser" />
+  <include package="my.pkg.missing" />
+  <include package="Products.CMFCore" file="permissions.zcml" />
+  <include file="missing.zcml" />
+
+  <adapter
+      factory=".adapters.Adapter"
+      for="* zope.interface.Interface"
+      provides=".interfaces.IFoo"
+      />
+  <utility component=".adapters.UTILITY" provides=".interfaces.IMissing" />
+
+  <configure zcml:condition="installed other.pkg">
+    <adapter factory="other.pkg.Missing" />
+  </configure>
+</configure>
+"""
+
+BROWSER_ZCML = """<configure xmlns:browser="http://namespaces.zope.org/browser">
+  <browser:page
+      name="view"
+      for="*"
+      class=".views.View"
+      template="view.pt"
+      permission="zope2.View"
+      />
+  <browser:page name="other" for="*" class="..adapters.Missing" />
+</configure>
+"""
+
+
+class TestZcml(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp(prefix="collective.recipe.vscode")
+        self.index_dir = os.path.join(self.location, ".vscode")
+        self.egg = os.path.join(self.location, "my.pkg")
+        mkdir(self.index_dir)
+        mkdir(self.egg)
+        mkdir(self.egg, "my")
+        mkdir(self.egg, "my", "pkg")
+        mkdir(self.egg, "my", "pkg", "browser")
+        self.package = os.path.join(self.egg, "my", "pkg")
+        write(
+            self.egg,
+            "my",
+            "__init__.py",
+            "__import__('pkg_resources').declare_namespace(__name__)\n",
+        )
+        write(self.package, "__init__.py", "")
+        write(self.package, "interfaces.py", "class IFoo(object):\n    pass\n")
+        write(
+            self.package,
+            "adapters.py",
+            "try:\n    from json import dumps as Adapter\nexcept ImportError:\n"
+            "    pass\nUTILITY = object()\n",
+        )
+        write(self.package, "configure.zcml", CONFIGURE_ZCML)
+        write(self.package, "browser", "__init__.py", "")
+        write(self.package, "browser", "views.py", "class View(object):\n    pass\n")
+        write(self.package, "browser", "view.pt", "")
+        write(self.package, "browser", "configure.zcml", BROWSER_ZCML)
+
+    def problems(self):
+        """ """
+        from ..zcml import ZCML_FILE
+
+        with open(os.path.join(self.index_dir, ZCML_FILE)) as fp:
+            index = json.loads(fp.read())
+        return sorted(
+            (os.path.relpath(path, self.package), line, message)
+            for path, line, message in index["problems"]
+        )
+
+    def test_absolute_name(self):
+        """ """
+        from ..zcml import absolute_name
+
+        self.assertEqual("my.pkg", absolute_name(".", "my.pkg"))
+        self.assertEqual("my.pkg.views.View", absolute_name(".views.View", "my.pkg"))
+        self.assertEqual("my.other", absolute_name("..other", "my.pkg"))
+        self.assertEqual("zope.Foo", absolute_name("zope.Foo", "my.pkg"))
+
+    def test_build_index(self):
+        """ """
+        from ..zcml import build_index
+
+        self.assertEqual((2, 0, 4), build_index(self.index_dir, [self.egg], 2))
+        expected = [
+            (
+                os.path.join("browser", "configure.zcml"),
+                9,
+                "class: Missing not found in module my.pkg.adapters",
+            ),
+            ("configure.zcml", 7, "package: missing not found in module my.pkg"),
+            ("configure.zcml", 9, "file missing.zcml not found"),
+            (
+                "configure.zcml",
+                16,
+                "provides: IMissing not found in module my.pkg.interfaces",
+            ),
+        ]
+        self.assertEqual(expected, self.problems())
+
+        # unchanged files are not parsed again, problems are checked again
+        write(self.package, "interfaces.py", "class IFoo:\n    pass\nIMissing = 1\n")
+        self.assertEqual((0, 2, 3), build_index(self.index_dir, [self.egg], 2))
+        self.assertEqual(expected[:3], self.problems())
+
+        # broken file
+        write(self.package, "browser", "configure.zcml", "<configure>")
+        later = time.time() + 10
+        path = os.path.join(self.package, "browser", "configure.zcml")
+        os.utime(path, (later, later))
+        self.assertEqual((1, 1, 3), build_index(self.index_dir, [self.egg], 2))
+        self.assertIn("no element found", self.problems()[0][2])
+
+    def test_symbol_index(self):
+        """Modules are looked up from the symbol index"""
+        from ..symbols import build_index as build_symbol_index
+        from ..zcml import build_index
+
+        build_symbol_index(self.index_dir, [[self.egg, [], True]], 2)
+        self.assertEqual((2, 0, 4), build_index(self.index_dir, [self.egg], 2))
+
+    def test_main(self):
+        """ """
+        from ..zcml import main
+
+        paths = {"python": "python", "eggs": [self.egg], "packages": []}
+        write(self.index_dir, "vs-recipe-paths.json", json.dumps(paths))
+        self.assertEqual(1, main(["--project-root", self.location]))
+
+        # paths file is not written yet
+        with self.assertRaises(SystemExit) as context:
+            main(["--project-root", os.path.join(self.location, "missing")])
+        self.assertEqual(2, context.exception.code)
+
+    def tearDown(self):
+        rmtree.rmtree(self.location)
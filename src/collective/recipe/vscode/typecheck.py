@@ -0,0 +1,205 @@
+# _*_ coding: utf-8 _*_
+"""Headless type checking of develop eggs, with the paths resolved by the recipe."""
+from .recipes import ensure_unicode
+from .recipes import find_executable_path
+from .recipes import load_paths
+from .recipes import mypy_paths
+from zc.buildout import UserError
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+DIAGNOSTIC_PATTERNS = {
+    "mypy": re.compile(r"^.+?:\d+:(\d+:)?\s+(error|warning):"),
+    "pyright": re.compile(r"^\s*.+?:\d+:\d+ - (error|warning):"),
+}
+
+
+def package_targets(location):
+    """Top level packages and modules inside develop egg location."""
+    targets = []
+    for name in sorted(os.listdir(location)):
+        path = os.path.join(location, name)
+        if name.startswith(".") or name.endswith(".egg-info"):
+            continue
+        if os.path.isdir(path):
+            if os.path.exists(os.path.join(path, "__init__.py")):
+                targets.append(path)
+        elif name.endswith(".py") and name != "setup.py":
+            targets.append(path)
+    return targets
+
+
+def search_paths(location, requirements):
+    """Develop egg itself first, mypy refuses site-packages in MYPYPATH."""
+    return [location] + mypy_paths(p for p in requirements if p != location)
+
+
+def mypy_command(executable, location, requirements, workdir):
+    """ """
+    env = dict(os.environ)
+    env["MYPYPATH"] = os.pathsep.join(search_paths(location, requirements))
+    command = [
+        executable,
+        "--namespace-packages",
+        "--explicit-package-bases",
+        "--show-column-numbers",
+        "--no-error-summary",
+        "--no-color-output",
+        "--cache-dir",
+        os.path.join(workdir, ".mypy_cache"),
+    ] + package_targets(location)
+    return command, env
+
+
+def pyright_command(executable, location, requirements, workdir):
+    """ """
+    config_file = os.path.join(workdir, "pyrightconfig.json")
+    with io.open(config_file, "w", encoding="utf-8") as fp:
+        config = {
+            "include": package_targets(location),
+            "extraPaths": search_paths(location, requirements)[1:],
+            "exclude": ["**/__pycache__", "**/.*"],
+        }
+        fp.write(ensure_unicode(json.dumps(config)))
+    return [executable, "-p", config_file], dict(os.environ)
+
+
+COMMANDS = {"mypy": mypy_command, "pyright": pyright_command}
+
+
+def check_package(job):
+    """Run type checker for one develop egg, this is executed in process pool."""
+    checker, executable, location, requirements = job
+    workdir = tempfile.mkdtemp(prefix="vscode-typecheck")
+    started = time.time()
+    result = {"location": location, "diagnostics": [], "error": None}
+    try:
+        command, env = COMMANDS[checker](executable, location, requirements, workdir)
+        process = subprocess.Popen(
+            command,
+            cwd=location,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        output, _ = process.communicate()
+        output = ensure_unicode(output)
+        result["returncode"] = process.returncode
+        result["diagnostics"] = [
+            line.strip()
+            for line in output.splitlines()
+            if DIAGNOSTIC_PATTERNS[checker].match(line)
+        ]
+        if process.returncode and not result["diagnostics"]:
+            result["error"] = output.strip()
+    except OSError as exc:
+        result["returncode"] = None
+        result["error"] = str(exc)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    result["seconds"] = round(time.time() - started, 2)
+    return result
+
+
+def format_report(checker, results):
+    """ """
+    width = max([len(r["location"]) for r in results] + [len("package")])
+    row = "{0:<{width}}  {1:>11}  {2:>8}  {3}"
+    lines = [row.format("package", "diagnostics", "seconds", "status", width=width)]
+    for result in results:
+        if result["error"]:
+            status = "error"
+        elif result["diagnostics"]:
+            status = "failed"
+        else:
+            status = "ok"
+        lines.append(
+            row.format(
+                result["location"],
+                len(result["diagnostics"]),
+                "{0:.2f}".format(result["seconds"]),
+                status,
+                width=width,
+            )
+        )
+    lines.append(
+        row.format(
+            "total",
+            sum(len(r["diagnostics"]) for r in results),
+            "{0:.2f}".format(sum(r["seconds"] for r in results)),
+            checker,
+            width=width,
+        )
+    )
+    for result in results:
+        if result["diagnostics"] or result["error"]:
+            lines.extend(["", result["location"]])
+            lines.extend(
+                "    " + line
+                for line in result["diagnostics"] or result["error"].splitlines()
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """vscode-typecheck: type check all develop eggs in parallel."""
+    parser = argparse.ArgumentParser(
+        description="Type check develop eggs with paths resolved by "
+        "collective.recipe.vscode, locally and offline."
+    )
+    parser.add_argument("--project-root", default=os.getcwd())
+    parser.add_argument("--checker", choices=sorted(COMMANDS), default="mypy")
+    parser.add_argument(
+        "--executable", help="Type checker executable (default: found in PATH)"
+    )
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--json", dest="json_file", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        paths = load_paths(args.project_root)
+    except UserError as exc:
+        parser.error(str(exc))
+    executable = args.executable or find_executable_path(args.checker) or args.checker
+    jobs = [
+        (
+            args.checker,
+            executable,
+            location,
+            paths["develop-requirements"].get(location, paths["eggs"])
+            + paths["packages"],
+        )
+        for location in paths["develop"]
+    ]
+    if not jobs:
+        print("No develop eggs to check.")
+        return 0
+
+    pool = multiprocessing.Pool(max(1, min(args.processes, len(jobs))))
+    try:
+        results = pool.map(check_package, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+    print(format_report(args.checker, results))
+    if args.json_file:
+        with io.open(args.json_file, "w", encoding="utf-8") as fp:
+            fp.write(ensure_unicode(json.dumps(results, indent=2, sort_keys=True)))
+
+    return 1 if any(r["diagnostics"] or r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
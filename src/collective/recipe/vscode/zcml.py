@@ -0,0 +1,361 @@
+# _*_ coding: utf-8 _*_
+"""Index of ZCML registrations (configure.zcml and meta.zcml) of eggs locations,
+and validation of their dotted names and files without importing anything.
+
+Dotted names are looked up in the symbol index (symbols.json, modules of not
+indexed locations are found from the file system) and in the top level names of
+the module source. Names under unresolved namespace packages or outside of the
+working set cannot be checked, those are not reported.
+"""
+from .recipes import load_paths
+from .symbols import IGNORED_DIRECTORIES
+from .symbols import load_index
+from .symbols import module_name
+from xml.parsers import expat
+from zc.buildout import UserError
+
+import argparse
+import ast
+import io
+import json
+import multiprocessing
+import os
+import sys
+
+
+INDEX_VERSION = 1
+ZCML_FILE = "zcml.json"
+ZCML_FILENAMES = ("configure.zcml", "meta.zcml")
+CONDITION = "http://namespaces.zope.org/zcml condition"
+
+# attributes holding (whitespace separated) dotted names
+DOTTED_ATTRIBUTES = (
+    "allowed_interface",
+    "class",
+    "component",
+    "factory",
+    "for",
+    "handler",
+    "initialize",
+    "interface",
+    "layer",
+    "manager",
+    "marker",
+    "provides",
+    "schema",
+    "view",
+)
+# attributes holding file or directory paths
+FILE_ATTRIBUTES = ("directory", "file", "template")
+INDEXED_ATTRIBUTES = ("name", "package") + DOTTED_ATTRIBUTES + FILE_ATTRIBUTES
+
+
+def find_files(location):
+    """ZCML files of the location, this is executed in process pool."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(location):
+        dirnames[:] = sorted(
+            d
+            for d in dirnames
+            if not d.startswith(".")
+            and not d.endswith(".egg-info")
+            and d not in IGNORED_DIRECTORIES
+        )
+        for filename in sorted(filenames):
+            if filename in ZCML_FILENAMES:
+                path = os.path.join(dirpath, filename)
+                found.append([path, os.path.getmtime(path)])
+    return location, found
+
+
+def find_modules(location):
+    """Python modules of not indexed location, this is executed in process pool."""
+    modules = {}
+    for dirpath, dirnames, filenames in os.walk(location):
+        dirnames[:] = [
+            d
+            for d in dirnames
+            if not d.startswith(".") and d not in IGNORED_DIRECTORIES
+        ]
+        for filename in filenames:
+            if filename.endswith(".py"):
+                path = os.path.join(dirpath, filename)
+                modules[module_name(location, path)] = path
+    return location, modules
+
+
+def parse_file(path):
+    """Registrations of ZCML file, this is executed in process pool. Directives
+    are prefixed by the last segment of their namespace (i.e. browser:page),
+    conditional ones (zcml:condition on them or on their parents) are marked."""
+    registrations = []
+    conditional = [False]
+    parser = expat.ParserCreate(namespace_separator=" ")
+
+    def start(tag, attributes):
+        namespace, _, directive = tag.rpartition(" ")
+        if namespace:
+            prefix = namespace.rstrip("/").split("/")[-1]
+            directive = "{0}:{1}".format(prefix, directive)
+        conditional.append(conditional[-1] or CONDITION in attributes)
+        registration = dict(
+            (key, value)
+            for key, value in attributes.items()
+            if key in INDEXED_ATTRIBUTES
+        )
+        registration["directive"] = directive
+        registration["line"] = parser.CurrentLineNumber
+        if conditional[-1]:
+            registration["conditional"] = True
+        registrations.append(registration)
+
+    def end(tag):
+        conditional.pop()
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    try:
+        with io.open(path, "rb") as fp:
+            parser.ParseFile(fp)
+    except expat.ExpatError as exc:
+        return path, registrations, [exc.lineno, str(exc)]
+    except IOError as exc:
+        return path, [], [0, str(exc)]
+    return path, registrations, None
+
+
+def _assigned_names(target):
+    """ """
+    if isinstance(target, ast.Name):
+        return [target.id]
+    if isinstance(target, (ast.Tuple, ast.List)):
+        return [n for element in target.elts for n in _assigned_names(element)]
+    return []
+
+
+def _top_level_names(body):
+    """Names bound at module level, also inside if/try blocks."""
+    names = set()
+    for node in body:
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef)) or (
+            type(node).__name__ == "AsyncFunctionDef"
+        ):
+            names.add(node.name)
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                names.update(_assigned_names(target))
+        elif type(node).__name__ == "AnnAssign":
+            names.update(_assigned_names(node.target))
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                names.add((alias.asname or alias.name).split(".")[0])
+        else:
+            for field in ("body", "orelse", "finalbody", "handlers"):
+                names.update(_top_level_names(getattr(node, field, None) or []))
+    return names
+
+
+def module_names(path, cache):
+    """Top level names of module source, None if those cannot be known (i.e.
+    namespace package or broken source)."""
+    if path not in cache:
+        try:
+            with io.open(path, "rb") as fp:
+                source = fp.read()
+            if b"declare_namespace" in source or b"extend_path" in source:
+                # subpackages may live in any other location
+                cache[path] = None
+            else:
+                cache[path] = _top_level_names(ast.parse(source, path).body)
+        except (SyntaxError, ValueError, TypeError, IOError):
+            cache[path] = None
+    return cache[path]
+
+
+def check_name(name, modules, cache):
+    """Problem of dotted name, None if found or if it cannot be checked."""
+    if name in modules:
+        return None
+    parts = name.split(".")
+    for index in range(len(parts) - 1, 0, -1):
+        module = ".".join(parts[:index])
+        if module not in modules:
+            continue
+        names = module_names(modules[module], cache)
+        if names is None or "*" in names or parts[index] in names:
+            return None
+        return "{0} not found in module {1}".format(parts[index], module)
+    # outside of the working set (i.e. interpreter's site-packages)
+    return None
+
+
+def absolute_name(name, package):
+    """Resolve relative dotted name (.browser.View) against the package."""
+    if not name.startswith("."):
+        return name
+    stripped = name.lstrip(".")
+    parents = package.split(".")
+    levels = len(name) - len(stripped) - 1
+    if levels:
+        parents = parents[:-levels]
+    return ".".join([p for p in parents + stripped.split(".") if p])
+
+
+def file_problems(path, package, registrations, modules, cache):
+    """[line, message] problems of the registrations of one ZCML file."""
+    problems = []
+    directory = os.path.dirname(path)
+    for registration in registrations:
+        if registration.get("conditional"):
+            # i.e. registrations for optional packages
+            continue
+        line = registration["line"]
+        base = directory
+        if "package" in registration:
+            included = absolute_name(registration["package"], package)
+            if included not in modules:
+                problem = check_name(included, modules, cache)
+                if problem:
+                    problems.append([line, "package: {0}".format(problem)])
+                # files of packages outside of the working set are not checked
+                continue
+            base = os.path.dirname(modules[included])
+        for key in FILE_ATTRIBUTES:
+            if key in registration and not os.path.exists(
+                os.path.join(base, registration[key])
+            ):
+                problems.append(
+                    [line, "{0} {1} not found".format(key, registration[key])]
+                )
+        for key in DOTTED_ATTRIBUTES:
+            for name in registration.get(key, "").split():
+                if name == "*":
+                    continue
+                problem = check_name(absolute_name(name, package), modules, cache)
+                if problem:
+                    problems.append([line, "{0}: {1}".format(key, problem)])
+    return problems
+
+
+def load_zcml_index(index_dir):
+    """ """
+    try:
+        with io.open(os.path.join(index_dir, ZCML_FILE), "rb") as fp:
+            index = json.loads(fp.read().decode("utf-8"))
+    except (IOError, ValueError):
+        return {}
+    if index.get("version") != INDEX_VERSION:
+        return {}
+    return index["files"]
+
+
+def build_index(index_dir, locations, processes=None):
+    """Index ZCML files of locations into index_dir (zcml.json) and validate
+    them. Only files with changed modification time are parsed (in parallel),
+    returns numbers of parsed and reused files and of problems."""
+    existing = load_zcml_index(index_dir)
+    locations = [location for location in locations if os.path.isdir(location)]
+    symbols = load_index(index_dir)
+
+    modules = {}
+    for location, entry in symbols.items():
+        for name, kind, relpath, _, _ in entry["symbols"]:
+            if kind == "module":
+                modules.setdefault(name, os.path.join(location, relpath))
+
+    files = {}
+    pool = multiprocessing.Pool(processes or multiprocessing.cpu_count())
+    try:
+        # modules of the locations, those are not in symbol index
+        not_indexed = [location for location in locations if location not in symbols]
+        for _, location_modules in pool.imap(find_modules, not_indexed):
+            for name, path in location_modules.items():
+                modules.setdefault(name, path)
+
+        stale = []
+        for location, found in pool.imap(find_files, locations):
+            for path, mtime in found:
+                if path in files:
+                    continue
+                package = module_name(location, os.path.dirname(path))
+                if path in existing and existing[path]["mtime"] == mtime:
+                    files[path] = existing[path]
+                else:
+                    files[path] = {"mtime": mtime, "package": package}
+                    stale.append(path)
+
+        for path, registrations, error in pool.imap_unordered(parse_file, stale):
+            files[path]["registrations"] = registrations
+            files[path]["error"] = error
+    finally:
+        pool.close()
+        pool.join()
+
+    # validated on each run, the referred modules may have changed
+    problems = []
+    cache = {}
+    for path, entry in sorted(files.items()):
+        if entry["error"]:
+            problems.append([path] + entry["error"])
+        for line, message in file_problems(
+            path, entry["package"], entry["registrations"], modules, cache
+        ):
+            problems.append([path, line, message])
+
+    with io.open(os.path.join(index_dir, ZCML_FILE), "wb") as fp:
+        data = {"version": INDEX_VERSION, "files": files, "problems": problems}
+        fp.write(json.dumps(data, sort_keys=True).encode("utf-8"))
+
+    return len(stale), len(files) - len(stale), len(problems)
+
+
+def format_report(index_dir):
+    """Registrations by directive and problems (file:line: error: message)."""
+    with io.open(os.path.join(index_dir, ZCML_FILE), "rb") as fp:
+        index = json.loads(fp.read().decode("utf-8"))
+
+    directives = {}
+    for entry in index["files"].values():
+        for registration in entry["registrations"]:
+            directive = registration["directive"]
+            directives[directive] = directives.get(directive, 0) + 1
+    row = "{0:<40}  {1:>7}"
+    lines = [row.format("directive", "count")]
+    for directive, count in sorted(
+        directives.items(), key=lambda item: (-item[1], item[0])
+    ):
+        lines.append(row.format(directive, count))
+    lines.append(
+        "{0} file(s), {1} problem(s)".format(
+            len(index["files"]), len(index["problems"])
+        )
+    )
+    for path, line, message in index["problems"]:
+        lines.append("{0}:{1}: error: {2}".format(path, line, message))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """vscode-zcml: index and validate ZCML files of the working set."""
+    parser = argparse.ArgumentParser(
+        description="Index ZCML registrations of eggs resolved by "
+        "collective.recipe.vscode and validate dotted names without importing."
+    )
+    parser.add_argument("--project-root", default=os.getcwd())
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args(argv)
+
+    try:
+        paths = load_paths(args.project_root)
+    except UserError as exc:
+        parser.error(str(exc))
+    index_dir = os.path.join(args.project_root, ".vscode")
+    _, _, problems = build_index(
+        index_dir, paths["eggs"] + paths["packages"], args.processes
+    )
+    print(format_report(index_dir))
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())